@@ -1,39 +1,152 @@
-from flask import Flask
+import os
+import time
+from flask import Flask, current_app
 from flask_cors import CORS
-from config.database import test_connection
+from config.database import test_connection, get_pool_stats, pool, PoolTimeout
+from config.cache import catalog_cache
+from config.compression import init_compression, compressed_cache
+from config.revocation import revocation_list
+from config.rate_limit import bucket_store
+from config.auth import check_monitoring
+from config.logger import init_request_logging, get_logger
+from config.metrics import init_metrics, register_gauges
+from config.serialization import init_json
+from services.uploads import MAX_UPLOAD_BYTES
+from services.bulk_products import IMPORT_MAX_BYTES
+from services.passwords import password_hasher
 from routes.products import products_bp
 from routes.cart import cart_bp
 from routes.orders import orders_bp
 from routes.admin import admin_bp
 from routes.auth import auth_bp
 
-app = Flask(__name__)
-CORS(app, origins=[
-    'http://localhost:8000',
-    'http://127.0.0.1:8000',
-    'http://ecommerce-frontend-ankush-2025.s3-website-us-east-1.amazonaws.com',
-    'https://mydukan.run.place',
-    'https://www.mydukan.run.place',
-    'https://api.mydukan.run.place'
-], supports_credentials=True, allow_headers=['Content-Type', 'Authorization'])
-
-# Register blueprints
-app.register_blueprint(products_bp, url_prefix='/api')
-app.register_blueprint(cart_bp, url_prefix='/api')
-app.register_blueprint(orders_bp, url_prefix='/api')
-app.register_blueprint(admin_bp, url_prefix='/api')
-app.register_blueprint(auth_bp, url_prefix='/api')
-
-@app.route('/api/test', methods=['GET'])
-def test():
-    return {'message': 'Backend is working!'}
-
-@app.route('/api/test-db', methods=['GET'])
-def test_db():
-    if test_connection():
-        return {'message': 'Database connected successfully!'}
-    else:
-        return {'error': 'Database connection failed!'}, 500
+logger = get_logger(__name__)
+
+# /api/ready waits at most this long for a pooled connection
+READY_DB_TIMEOUT = float(os.getenv('READY_DB_TIMEOUT', 1))
+# Catalog reads replayed by warm_up() to fill the caches before traffic arrives
+WARM_UP_PATHS = ('/api/categories', '/api/products')
+
+
+def create_app():
+    """Build the Flask application"""
+    app = Flask(__name__)
+    # Reject oversized bodies before they are read (leaves room for multipart framing).
+    # Bulk imports need the larger limit; image uploads enforce their own while spooling.
+    app.config['MAX_CONTENT_LENGTH'] = max(MAX_UPLOAD_BYTES, IMPORT_MAX_BYTES) + 64 * 1024
+    # Flipped by warm_up(); /api/ready reports 503 until then under gunicorn
+    app.config['WARMED_UP'] = False
+    init_json(app)
+    init_request_logging(app)
+    # Pool, cache and traffic figures are internal: admins or METRICS_TOKEN only
+    init_metrics(app, access_check=check_monitoring)
+    init_compression(app)
+    register_gauges('db_pool', get_pool_stats)
+    register_gauges('catalog_cache', catalog_cache.stats)
+    register_gauges('compressed_cache', compressed_cache.stats)
+    register_gauges('password_hasher', password_hasher.stats)
+    register_gauges('revoked_tokens', revocation_list.stats)
+    register_gauges('rate_limit', bucket_store.stats)
+    CORS(app, origins=[
+        'http://localhost:8000',
+        'http://127.0.0.1:8000',
+        'http://ecommerce-frontend-ankush-2025.s3-website-us-east-1.amazonaws.com',
+        'https://mydukan.run.place',
+        'https://www.mydukan.run.place',
+        'https://api.mydukan.run.place'
+    ], supports_credentials=True, allow_headers=['Content-Type', 'Authorization'])
+
+    # Register blueprints
+    app.register_blueprint(products_bp, url_prefix='/api')
+    app.register_blueprint(cart_bp, url_prefix='/api')
+    app.register_blueprint(orders_bp, url_prefix='/api')
+    app.register_blueprint(admin_bp, url_prefix='/api')
+    app.register_blueprint(auth_bp, url_prefix='/api')
+
+    @app.errorhandler(413)
+    def request_too_large(error):
+        return {'error': f"Request body exceeds {app.config['MAX_CONTENT_LENGTH'] // (1024 * 1024)} MB limit"}, 413
+
+    @app.route('/api/test', methods=['GET'])
+    def test():
+        return {'message': 'Backend is working!'}
+
+    @app.route('/api/test-db', methods=['GET'])
+    def test_db():
+        if test_connection():
+            return {'message': 'Database connected successfully!'}
+        else:
+            return {'error': 'Database connection failed!'}, 500
+
+    @app.route('/api/ready', methods=['GET'])
+    def ready():
+        """Readiness probe: warmed up and able to get a pooled connection quickly"""
+        if not current_app.config['WARMED_UP']:
+            return {'status': 'starting'}, 503
+        try:
+            conn = pool.acquire(timeout=READY_DB_TIMEOUT)
+        except PoolTimeout:
+            return {'status': 'busy', 'db_pool': get_pool_stats()}, 503
+        except Exception:
+            return {'status': 'database unavailable'}, 503
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+        except Exception:
+            return {'status': 'database unavailable'}, 503
+        finally:
+            conn.close()
+        return {'status': 'ready', 'db_pool': get_pool_stats()}
+
+    @app.route('/api/stats', methods=['GET'])
+    def stats():
+        error = check_monitoring()
+        if error:
+            return error
+        return {
+            'db_pool': get_pool_stats(),
+            'catalog_cache': catalog_cache.stats(),
+            'compressed_cache': compressed_cache.stats(),
+            'password_hasher': password_hasher.stats(),
+            'revoked_tokens': revocation_list.stats(),
+            'rate_limit': bucket_store.stats()
+        }
+
+    return app
+
+
+def warm_up(app):
+    """Prime this process before it takes traffic
+
+    Opens the pool's minimum connections, loads the revoked-token list and
+    starts its refresh thread, starts the password hashing processes and
+    replays the common catalog reads so their responses are cached. Run
+    once per worker, after fork. Failures are logged, not raised: a cold
+    worker still serves requests.
+    """
+    started = time.perf_counter()
+    # Outside the try so a failed pool warm-up cannot skip it; it never
+    # raises, and authenticate() starts it too if this process missed it
+    revocation_list.start()
+    try:
+        pool.warm_up()
+        password_hasher.warm_up()
+        client = app.test_client()
+        for path in WARM_UP_PATHS:
+            # Read the whole body: streamed listings are only cached once fully sent
+            response = client.get(path)
+            response.get_data()
+            if response.status_code != 200:
+                logger.warning("Warm-up request failed", extra={'path': path, 'status': response.status_code})
+    except Exception:
+        logger.exception("Warm-up failed")
+    app.config['WARMED_UP'] = True
+    logger.info("Worker warmed up", extra={'pid': os.getpid(), 'seconds': round(time.perf_counter() - started, 3)})
+
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=3000, debug=True)
\ No newline at end of file
+    # Development server; production runs gunicorn -c gunicorn.conf.py wsgi:app
+    app = create_app()
+    warm_up(app)
+    app.run(host='0.0.0.0', port=3000, debug=True)
@@ -0,0 +1,274 @@
+"""Micro-benchmarks for backend hot paths.
+
+    python benchmark.py json [--rows 5000] [--repeat 20]
+    python benchmark.py compression [--rows 5000] [--repeat 20]
+    python benchmark.py import [--rows 20000]       # needs DB_*; writes are rolled back
+    python benchmark.py login [--seconds 5]         # needs DB_* and an existing account
+
+Each subcommand prints one line per variant with the mean time per
+operation and the bytes produced, so variants can be compared directly.
+"""
+import argparse
+import statistics
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+
+def timed(fn, repeat):
+    """Run fn repeat times; return (mean seconds, last result)"""
+    samples = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.mean(samples), result
+
+
+def report(name, seconds, size=None, extra=''):
+    size_text = f"{size / 1024:10.1f} KiB" if size is not None else ' ' * 14
+    print(f"   {name:<28} {seconds * 1000:9.2f} ms {size_text}  {extra}")
+
+
+def sample_products(count):
+    """Rows shaped like RealDictCursor output for the products table"""
+    now = datetime(2025, 1, 1, 12, 0, 0)
+    return [
+        {
+            'id': i,
+            'name': f'Product {i}',
+            'description': 'A reasonably long product description that is typical for the catalog. ' * 3,
+            'price': Decimal('19.99') + i,
+            'category': ('Electronics', 'Audio', 'Fashion')[i % 3],
+            'stock': i % 50,
+            'image_key': f'products/{i:08x}.jpg',
+            'is_active': True,
+            'created_at': now - timedelta(minutes=i),
+            'updated_at': now,
+            'imageUrl': f'https://cdn.example.com/products/{i:08x}.jpg'
+        }
+        for i in range(count)
+    ]
+
+
+def bench_json(args):
+    """Default Flask JSON provider vs orjson provider vs streaming array"""
+    from flask import Flask
+    from flask.json.provider import DefaultJSONProvider
+    from config.serialization import FastJSONProvider, iter_json_array, orjson
+
+    rows = sample_products(args.rows)
+    default_app = Flask('default')
+    default_app.json = DefaultJSONProvider(default_app)
+    fast_app = Flask('fast')
+    fast_app.json = FastJSONProvider(fast_app)
+
+    print(f"📊 JSON serialization of {args.rows} product rows (orjson {'available' if orjson else 'missing'})")
+
+    with default_app.app_context():
+        seconds, response = timed(lambda: default_app.json.response(rows), args.repeat)
+        report('flask default jsonify', seconds, len(response.get_data()))
+
+    with fast_app.app_context():
+        seconds, response = timed(lambda: fast_app.json.response(rows), args.repeat)
+        report('fast provider jsonify', seconds, len(response.get_data()))
+
+    def stream():
+        first_chunk_at = None
+        started = time.perf_counter()
+        total = 0
+        for chunk in iter_json_array(rows):
+            if first_chunk_at is None:
+                first_chunk_at = time.perf_counter() - started
+            total += len(chunk)
+        return total, first_chunk_at
+
+    seconds, (size, first_chunk) = timed(stream, args.repeat)
+    report('streaming array', seconds, size, f'first byte after {first_chunk * 1000:.3f} ms')
+
+
+def bench_compression(args):
+    """Bytes on the wire and CPU per response for each encoding / level"""
+    import zlib
+    from config.serialization import dumps_bytes
+    from config import compression
+
+    body = dumps_bytes(sample_products(args.rows))
+    print(f"📊 Compression of a {args.rows}-row product listing "
+          f"(brotli {'available' if compression.brotli else 'missing'})")
+    report('identity', 0.0, len(body), 'ratio 1.00')
+
+    def gzip_level(level):
+        def run():
+            compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+            return compressor.compress(body) + compressor.flush()
+        return run
+
+    variants = [(f'gzip level {level}', gzip_level(level)) for level in (1, 6, 9)]
+    if compression.brotli:
+        variants += [(f'brotli quality {quality}', lambda quality=quality: compression.brotli.compress(body, quality=quality))
+                     for quality in (1, 5, 9)]
+
+    for name, run in variants:
+        seconds, data = timed(run, args.repeat)
+        report(name, seconds, len(data), f'ratio {len(body) / len(data):.2f}')
+
+    # Streaming path: one sync flush per serialized batch
+    for encoding in compression.ENCODINGS:
+        chunks = [body[i:i + 64 * 1024] for i in range(0, len(body), 64 * 1024)]
+        seconds, data = timed(lambda: b''.join(compression.compress_stream(iter(chunks), encoding)), args.repeat)
+        report(f'{encoding} streamed (64 KiB chunks)', seconds, len(data), f'ratio {len(body) / len(data):.2f}')
+
+    # Precompressed cache: a hit costs a dict lookup instead of a compression
+    compression.compressed_cache.set('bench', compression.compress_body(body, compression.ENCODINGS[0]))
+    seconds, data = timed(lambda: compression.compressed_cache.get('bench'), args.repeat)
+    report(f'{compression.ENCODINGS[0]} precompressed hit', seconds, len(data))
+
+
+def bench_import(args):
+    """Row-at-a-time INSERTs (seed_data / create_product path) vs COPY + upsert import"""
+    import csv
+    import io
+    from config.database import create_connection
+    from services.bulk_products import import_products
+    from services.search import SEARCH_VECTOR_SQL
+
+    records = [
+        (f'BENCH-{i:07d}', f'Bench product {i}', 'Imported by benchmark.py ' * 4,
+         f'{19.99 + i % 100:.2f}', ('Electronics', 'Audio', 'Fashion')[i % 3], i % 50)
+        for i in range(args.rows)
+    ]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(['sku', 'name', 'description', 'price', 'category', 'stock'])
+    writer.writerows(records)
+    csv_text = buffer.getvalue()
+
+    print(f"📊 Loading {args.rows} products (every run is rolled back)")
+    conn = create_connection()
+    try:
+        def row_at_a_time():
+            cursor = conn.cursor()
+            for record in records:
+                cursor.execute("""
+                    INSERT INTO products (sku, name, description, price, category, stock)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                """, record)
+            cursor.execute(f"UPDATE products SET search_vector = {SEARCH_VECTOR_SQL} WHERE search_vector IS NULL")
+            cursor.close()
+            conn.rollback()
+
+        seconds, _ = timed(row_at_a_time, 1)
+        report('INSERT per row', seconds, extra=f'{args.rows / seconds:10.0f} rows/s')
+
+        seconds, result = timed(lambda: import_products(conn, io.StringIO(csv_text), 'csv', dry_run=True), 1)
+        report('COPY + upsert import', seconds, len(csv_text), f'{args.rows / seconds:10.0f} rows/s '
+               f"({result['inserted']} inserted, {result['rejected']} rejected)")
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+def bench_login(args):
+    """Login throughput vs catalog latency on a fixed pool of server threads
+
+    Logins and catalog reads share --threads "server" threads, like a
+    threaded WSGI worker. With bcrypt inline every login holds a thread for
+    the whole hash; on the process pool excess logins get a fast 503.
+    """
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+    import routes.auth as auth_routes
+    from app import create_app
+    from config import rate_limit
+    from services.passwords import PasswordHasher, PASSWORD_WORKERS, BCRYPT_ROUNDS
+
+    rate_limit.RATE_LIMIT_ENABLED = False  # one client hammering one account is the point here
+    client = create_app().test_client()
+    credentials = {'email': args.email, 'password': args.password}
+    if client.post('/api/auth/login', json=credentials).status_code != 200:
+        print(f"❌ Cannot log in as {args.email}; pass --email/--password of an existing account")
+        return
+    client.get('/api/products')  # warm the catalog cache
+
+    def run(name, hasher, login_clients):
+        if hasher:
+            auth_routes.password_hasher = hasher
+            hasher.warm_up()
+        server = ThreadPoolExecutor(max_workers=args.threads)
+        deadline = time.perf_counter() + args.seconds
+        statuses = {}
+        latencies = []
+        lock = threading.Lock()
+
+        def login_loop():
+            while time.perf_counter() < deadline:
+                status = server.submit(lambda: client.post('/api/auth/login', json=credentials).status_code).result()
+                with lock:
+                    statuses[status] = statuses.get(status, 0) + 1
+                if status == 503:
+                    time.sleep(0.01)
+
+        def catalog_loop():
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                server.submit(lambda: client.get('/api/products').status_code).result()
+                latencies.append(time.perf_counter() - started)
+                time.sleep(0.01)
+
+        threads = [threading.Thread(target=login_loop) for _ in range(login_clients)]
+        threads.append(threading.Thread(target=catalog_loop))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        server.shutdown()
+
+        latencies.sort()
+        p50 = latencies[len(latencies) // 2]
+        p95 = latencies[int(len(latencies) * 0.95)]
+        logins = statuses.get(200, 0) / args.seconds
+        report(name, p50, extra=f'catalog p95 {p95 * 1000:8.2f} ms  logins {logins:6.1f}/s  '
+                                f'503s {statuses.get(503, 0)}')
+
+    print(f"📊 {args.clients} login clients vs catalog reads on {args.threads} server threads "
+          f"for {args.seconds}s each (bcrypt cost {BCRYPT_ROUNDS}; times are catalog p50)")
+    run('catalog only', None, 0)
+    run('bcrypt inline', PasswordHasher(workers=0), args.clients)
+    run(f'bcrypt pool ({PASSWORD_WORKERS} procs)',
+        PasswordHasher(workers=PASSWORD_WORKERS, max_pending=max(1, args.threads // 2)), args.clients)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Backend micro-benchmarks')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    json_parser = subparsers.add_parser('json', help='JSON serialization of product listings')
+    json_parser.add_argument('--rows', type=int, default=5000)
+    json_parser.add_argument('--repeat', type=int, default=20)
+    json_parser.set_defaults(func=bench_json)
+
+    compression_parser = subparsers.add_parser('compression', help='gzip/brotli cost and ratio on product listings')
+    compression_parser.add_argument('--rows', type=int, default=5000)
+    compression_parser.add_argument('--repeat', type=int, default=20)
+    compression_parser.set_defaults(func=bench_compression)
+
+    import_parser = subparsers.add_parser('import', help='bulk product import vs row-at-a-time inserts')
+    import_parser.add_argument('--rows', type=int, default=20000)
+    import_parser.set_defaults(func=bench_import)
+
+    login_parser = subparsers.add_parser('login', help='login throughput vs concurrent catalog latency')
+    login_parser.add_argument('--seconds', type=float, default=5)
+    login_parser.add_argument('--clients', type=int, default=16, help='concurrent login loops')
+    login_parser.add_argument('--threads', type=int, default=8, help='server threads shared by all requests')
+    login_parser.add_argument('--email', default='admin@mystore.com')
+    login_parser.add_argument('--password', default='Admin@123')
+    login_parser.set_defaults(func=bench_login)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
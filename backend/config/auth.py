@@ -0,0 +1,180 @@
+import hashlib
+import hmac
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+from functools import wraps
+import jwt
+from flask import g, jsonify, request
+from dotenv import load_dotenv
+from config.cache import TTLCache
+from config.revocation import revocation_list, use_refresh_token
+
+load_dotenv()
+
+# JWT Configuration
+SECRET_KEY = os.getenv('JWT_SECRET_KEY')
+ALGORITHM = 'HS256'
+# Access tokens are short-lived so the revocation list only has to hold
+# minutes' worth of logouts; clients renew them with a refresh token
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv('ACCESS_TOKEN_EXPIRE_MINUTES', 15))
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv('REFRESH_TOKEN_EXPIRE_DAYS', 7))
+
+# Verified-token cache: a hit costs a hash and a dict lookup instead of an HMAC check
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv('AUTH_CACHE_MAX_ENTRIES', 10000))
+AUTH_CACHE_TTL = float(os.getenv('AUTH_CACHE_TTL', 300))   # upper bound; entries never outlive exp
+
+# Shared secret that lets a metrics scraper read /metrics and /api/stats without
+# an admin JWT (send it as a Bearer token); unset means admins only
+METRICS_TOKEN = os.getenv('METRICS_TOKEN') or None
+
+token_cache = TTLCache(max_entries=AUTH_CACHE_MAX_ENTRIES, ttl=AUTH_CACHE_TTL)
+
+
+class AuthError(Exception):
+    """Token missing, malformed, expired or not allowed"""
+
+    def __init__(self, message, status=401):
+        super().__init__(message)
+        self.status = status
+
+
+def create_access_token(user_id, email, name, is_admin=False):
+    """Create JWT access token"""
+    expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    payload = {
+        'user_id': user_id,
+        'email': email,
+        'name': name,
+        'is_admin': is_admin,
+        'type': 'access',
+        'jti': uuid.uuid4().hex,
+        'exp': expire
+    }
+    return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
+
+
+def create_refresh_token(user_id):
+    """Create JWT refresh token (only good for /auth/refresh)"""
+    expire = datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    payload = {
+        'user_id': user_id,
+        'type': 'refresh',
+        'jti': uuid.uuid4().hex,
+        'exp': expire
+    }
+    return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
+
+
+def verify_token(token, token_type='access'):
+    """Verify JWT token of the given type"""
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM], options={'require': ['exp', 'jti']})
+    except jwt.ExpiredSignatureError:
+        raise AuthError('Token expired')
+    except jwt.InvalidTokenError:
+        raise AuthError('Invalid token')
+    if payload.get('type') != token_type:
+        raise AuthError('Invalid token')
+    return payload
+
+
+def authenticate(token, token_type='access'):
+    """Payload for a token, served from token_cache when it was verified before
+
+    Keys are sha256(token) so raw tokens are never held in memory longer
+    than the request. Entries expire with the token's own exp claim.
+    Access tokens are checked against the revocation list on every call,
+    cached or not; refresh tokens are checked when revoke_token() spends
+    them.
+    """
+    key = hashlib.sha256(token.encode('utf-8')).digest()
+    payload = token_cache.get(key)
+    if payload is None:
+        payload = verify_token(token, token_type)
+        remaining = payload['exp'] - time.time()
+        if remaining > 0:
+            token_cache.set(key, payload, ttl=min(remaining, AUTH_CACHE_TTL))
+    elif payload.get('type') != token_type:
+        raise AuthError('Invalid token')
+
+    if token_type == 'access':
+        revocation_list.start()
+        if revocation_list.is_revoked(payload['jti']):
+            raise AuthError('Token revoked')
+    return payload
+
+
+def revoke_token(payload):
+    """Revoke a verified token until it expires; False if it already was"""
+    if payload.get('type') == 'refresh':
+        return use_refresh_token(payload['jti'], payload['exp'])
+    return revocation_list.revoke(payload['jti'], payload['exp'])
+
+
+def bearer_token():
+    """Token from the Authorization header, or None"""
+    auth_header = request.headers.get('Authorization', '')
+    scheme, _, token = auth_header.partition(' ')
+    if scheme.lower() == 'bearer' and token.strip():
+        return token.strip()
+    return None
+
+
+def load_user():
+    """Authenticate the request and set g.user; raises AuthError"""
+    token = bearer_token()
+    if not token:
+        raise AuthError('Authentication required')
+    payload = authenticate(token)
+    g.user = {
+        'id': payload['user_id'],
+        'email': payload['email'],
+        'name': payload['name'],
+        'is_admin': payload.get('is_admin', False)
+    }
+    return g.user
+
+
+def current_user_id():
+    """Authenticated user's id as stored in cart/orders (VARCHAR)"""
+    return str(g.user['id'])
+
+
+def require_auth(view):
+    """Reject the request with 401 unless it carries a valid Bearer token"""
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        try:
+            load_user()
+        except AuthError as e:
+            return jsonify({'error': str(e)}), e.status
+        return view(*args, **kwargs)
+
+    return wrapper
+
+
+def check_admin():
+    """Error response unless the request is from an admin, else None
+
+    Usable directly as a blueprint before_request hook.
+    """
+    if request.method == 'OPTIONS':
+        return None  # CORS preflight carries no credentials
+    try:
+        user = load_user()
+    except AuthError as e:
+        return jsonify({'error': str(e)}), e.status
+    if not user['is_admin']:
+        return jsonify({'error': 'Admin access required'}), 403
+    return None
+
+
+def check_monitoring():
+    """Error response unless the request carries METRICS_TOKEN or an admin token, else None"""
+    token = bearer_token()
+    if METRICS_TOKEN and token and hmac.compare_digest(token.encode('utf-8'), METRICS_TOKEN.encode('utf-8')):
+        return None
+    return check_admin()
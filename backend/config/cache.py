@@ -0,0 +1,135 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Cache configuration
+CATALOG_CACHE_TTL = float(os.getenv('CATALOG_CACHE_TTL', 60))          # seconds
+CATALOG_CACHE_MAX_ENTRIES = int(os.getenv('CATALOG_CACHE_MAX_ENTRIES', 512))
+# Streamed listings larger than this are served but not kept in the cache
+CATALOG_CACHE_MAX_BODY_BYTES = int(os.getenv('CATALOG_CACHE_MAX_BODY_BYTES', 4 * 1024 * 1024))
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after `ttl` seconds"""
+
+    def __init__(self, max_entries=CATALOG_CACHE_MAX_ENTRIES, ttl=CATALOG_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key, default=None):
+        """Return the cached value for key, or default if missing or expired"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        """Store value under key, evicting the least recently used entry if full"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        """Drop a single key"""
+        with self._lock:
+            if self._data.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def delete_where(self, predicate):
+        """Drop every key for which predicate(key) is true"""
+        with self._lock:
+            keys = [key for key in self._data if predicate(key)]
+            for key in keys:
+                del self._data[key]
+            self.invalidations += len(keys)
+
+    def clear(self):
+        """Drop everything"""
+        with self._lock:
+            self.invalidations += len(self._data)
+            self._data.clear()
+
+    def stats(self):
+        """Snapshot of cache counters for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._data),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations
+            }
+
+
+# Shared cache for storefront catalog reads (products, product detail, categories).
+# Each worker process has its own copy; the TTL bounds how long another worker
+# can serve a listing after an admin write it did not see.
+catalog_cache = TTLCache()
+
+
+def product_list_key(category=None, search=None, min_price=None, max_price=None,
+                     limit=None, cursor=None, fields=None):
+    """Normalized cache key for a product listing filter and page"""
+    return (
+        'products',
+        category or None,
+        search.strip().lower() if search and search.strip() else None,
+        float(min_price) if min_price not in (None, '') else None,
+        float(max_price) if max_price not in (None, '') else None,
+        limit,
+        cursor or None,
+        tuple(fields) if fields else None
+    )
+
+
+def product_key(product_id):
+    """Cache key for a single product"""
+    return ('product', int(product_id))
+
+
+CATEGORIES_KEY = ('categories',)
+CATALOG_VERSION_KEY = ('catalog_version',)
+
+
+def invalidate_product(product_id, categories_changed=True):
+    """Invalidate everything an admin write to product_id can affect"""
+    catalog_cache.delete(product_key(product_id))
+    catalog_cache.delete_where(lambda key: key[0] == 'products')
+    if categories_changed:
+        catalog_cache.delete(CATEGORIES_KEY)
+    catalog_cache.delete(CATALOG_VERSION_KEY)
+
+
+def invalidate_catalog():
+    """Drop every cached catalog read (e.g. after a bulk write or one made by another worker)"""
+    catalog_cache.delete_where(lambda key: key[0] in ('products', 'product', 'categories', 'catalog_version'))
@@ -0,0 +1,113 @@
+import hashlib
+import os
+import zlib
+from flask import request
+from dotenv import load_dotenv
+from config.cache import TTLCache
+
+try:
+    import brotli
+except ImportError:  # optional; gzip is always available
+    brotli = None
+
+load_dotenv()
+
+# Compression configuration
+COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))       # bytes; smaller bodies go out as-is
+COMPRESS_GZIP_LEVEL = int(os.getenv('COMPRESS_GZIP_LEVEL', 6))
+COMPRESS_BROTLI_QUALITY = int(os.getenv('COMPRESS_BROTLI_QUALITY', 5))
+COMPRESS_MIMETYPES = {'application/json', 'text/plain', 'text/html', 'text/css', 'application/javascript'}
+# Compressed bodies of versioned (ETag'd) responses, keyed by a digest of the
+# uncompressed bytes so a hit is always the same body the client would get plain
+COMPRESS_CACHE_MAX_ENTRIES = int(os.getenv('COMPRESS_CACHE_MAX_ENTRIES', 256))
+COMPRESS_CACHE_TTL = float(os.getenv('COMPRESS_CACHE_TTL', 300))
+
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+compressed_cache = TTLCache(max_entries=COMPRESS_CACHE_MAX_ENTRIES, ttl=COMPRESS_CACHE_TTL)
+
+
+def choose_encoding(accept_encodings):
+    """Best supported encoding the client accepts (brotli preferred), or None"""
+    return accept_encodings.best_match(ENCODINGS)
+
+
+def compress_body(data, encoding):
+    """Compress a complete body with encoding"""
+    if encoding == 'br':
+        return brotli.compress(data, quality=COMPRESS_BROTLI_QUALITY)
+    compressor = zlib.compressobj(COMPRESS_GZIP_LEVEL, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+
+def compress_stream(chunks, encoding):
+    """Compress an iterable of chunks, flushing after each so data keeps flowing"""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=COMPRESS_BROTLI_QUALITY)
+        process, flush, finish = compressor.process, compressor.flush, compressor.finish
+    else:
+        compressor = zlib.compressobj(COMPRESS_GZIP_LEVEL, zlib.DEFLATED, 31)
+        process, flush, finish = compressor.compress, lambda: compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush
+
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            data = process(chunk) + flush()
+            if data:
+                yield data
+        yield finish()
+    finally:
+        # Closing the source runs its cleanup (e.g. returning a DB connection)
+        close = getattr(chunks, 'close', None)
+        if close:
+            close()
+
+
+def compress_response(response):
+    """Encode response for the client's Accept-Encoding when it is worth it"""
+    if (response.status_code < 200 or response.status_code in (204, 206, 304)
+            or request.method == 'HEAD'
+            or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESS_MIMETYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = compress_stream(response.response, encoding)
+        response.headers.pop('Content-Length', None)
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_SIZE:
+        return response
+
+    etag, weak = response.get_etag()
+    # Hashing costs a fraction of compressing, so only fresh bodies pay for the latter
+    cache_key = (hashlib.blake2b(data, digest_size=16).digest(), encoding) if etag else None
+    body = compressed_cache.get(cache_key) if cache_key else None
+    if body is None:
+        body = compress_body(data, encoding)
+        if cache_key:
+            compressed_cache.set(cache_key, body)
+
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    if etag and not weak:
+        # A strong ETag names exact bytes, so each encoding needs its own
+        response.set_etag(f'{etag}-{encoding}')
+    return response
+
+
+def init_compression(app):
+    """Compress eligible responses
+
+    Register after init_metrics so response-size metrics see bytes on the wire.
+    """
+    app.after_request(compress_response)
@@ -1,34 +1,322 @@
 import psycopg2
 from psycopg2.extras import RealDictCursor
 import os
+import threading
+import time
+import uuid
 from dotenv import load_dotenv
+from config.logger import get_logger
+from config.metrics import InstrumentedCursor, record_pool_wait
 
 # Load environment variables from .env file
 load_dotenv()
 
+logger = get_logger(__name__)
+
+# Pool configuration
+DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', 1))
+DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', 10))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 5))           # seconds to wait for a free connection
+DB_POOL_MAX_USES = int(os.getenv('DB_POOL_MAX_USES', 1000))         # recycle after this many checkouts
+DB_POOL_MAX_AGE = float(os.getenv('DB_POOL_MAX_AGE', 1800))         # recycle after this many seconds
+DB_POOL_CHECK_IDLE = float(os.getenv('DB_POOL_CHECK_IDLE', 30))     # ping connections idle longer than this
+DB_STREAM_ITERSIZE = int(os.getenv('DB_STREAM_ITERSIZE', 500))       # rows per FETCH for streamed queries
+
+
+def create_connection(database=None):
+    """Open a brand-new database connection (bypasses the pool)
+
+    database overrides DB_NAME, e.g. to reach a maintenance database.
+    """
+    return psycopg2.connect(
+        host=os.getenv('DB_HOST'),
+        port=os.getenv('DB_PORT'),
+        database=database or os.getenv('DB_NAME'),
+        user=os.getenv('DB_USER'),
+        password=os.getenv('DB_PASSWORD'),
+        cursor_factory=RealDictCursor
+    )
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes available within the acquire timeout"""
+
+
+class PooledConnection:
+    """Wraps a psycopg2 connection so that close() hands it back to the pool
+
+    As a context manager it commits on a clean exit and rolls back on an
+    exception, like psycopg2's own connections, then returns itself to the
+    pool.
+    """
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.uses = 0
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self._raw.commit()
+        finally:
+            # release() rolls back whatever is still open
+            self.close()
+
+    def cursor(self, *args, **kwargs):
+        """Cursor whose statements are counted and timed for /metrics"""
+        return InstrumentedCursor(self._raw.cursor(*args, **kwargs))
+
+    def close(self):
+        """Return the connection to the pool instead of closing it"""
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            pool.release(self)
+
+    @property
+    def closed(self):
+        return self._pool is None or self._raw.closed
+
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of psycopg2 connections"""
+
+    def __init__(self, connect=create_connection, min_size=DB_POOL_MIN_SIZE,
+                 max_size=DB_POOL_MAX_SIZE, timeout=DB_POOL_TIMEOUT,
+                 max_uses=DB_POOL_MAX_USES, max_age=DB_POOL_MAX_AGE,
+                 check_idle=DB_POOL_CHECK_IDLE):
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_uses = max_uses
+        self.max_age = max_age
+        self.check_idle = check_idle
+
+        self._lock = threading.Condition()
+        self._idle = []
+        self._in_use = 0
+        self._size = 0
+        self._pid = os.getpid()
+
+        self._acquired = 0
+        self._timeouts = 0
+        self._recycled = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _reset_after_fork(self):
+        """Drop connections inherited from a parent process"""
+        # Sockets shared with the parent must never be used by the child
+        self._idle = []
+        self._in_use = 0
+        self._size = 0
+        self._pid = os.getpid()
+
+    def _expired(self, wrapper):
+        now = time.monotonic()
+        return (wrapper.uses >= self.max_uses or
+                now - wrapper.created_at >= self.max_age)
+
+    def _healthy(self, wrapper):
+        raw = wrapper._raw
+        if raw.closed:
+            return False
+        if time.monotonic() - wrapper.last_used < self.check_idle:
+            return True
+        try:
+            with raw.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            raw.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def acquire(self, timeout=None):
+        """Check out a connection, waiting up to `timeout` seconds for one to free up"""
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset_after_fork()
+
+            while True:
+                if self._idle:
+                    wrapper = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    # Reserve the slot before connecting outside the lock
+                    self._size += 1
+                    wrapper = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeout(f'No database connection available after {timeout}s')
+                self._lock.wait(remaining)
+
+            self._in_use += 1
+
+        try:
+            if wrapper is not None and (self._expired(wrapper) or not self._healthy(wrapper)):
+                self._discard(wrapper._raw)
+                with self._lock:
+                    self._recycled += 1
+                wrapper = None
+            if wrapper is None:
+                wrapper = PooledConnection(self, self._connect())
+        except Exception:
+            with self._lock:
+                self._in_use -= 1
+                self._size -= 1
+                self._lock.notify()
+            raise
+
+        waited = time.monotonic() - started
+        with self._lock:
+            self._acquired += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        record_pool_wait(waited)
+
+        wrapper._pool = self
+        wrapper.uses += 1
+        return wrapper
+
+    def release(self, wrapper):
+        """Return a connection to the pool, discarding it if it is broken or worn out"""
+        raw = wrapper._raw
+        keep = not raw.closed
+        if keep:
+            try:
+                # Never hand out a connection with an open transaction
+                if raw.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    raw.rollback()
+            except Exception:
+                keep = False
+        if keep and self._expired(wrapper):
+            keep = False
+
+        with self._lock:
+            if self._pid != os.getpid():
+                return
+            self._in_use -= 1
+            if keep:
+                wrapper.last_used = time.monotonic()
+                self._idle.append(wrapper)
+            else:
+                self._size -= 1
+                self._recycled += 1
+            self._lock.notify()
+
+        if not keep:
+            self._discard(raw)
+
+    def warm_up(self):
+        """Open connections up to min_size so the first requests skip the connect cost"""
+        opened = []
+        try:
+            while len(opened) < self.min_size:
+                opened.append(self.acquire())
+        finally:
+            for wrapper in opened:
+                wrapper.close()
+
+    def close_all(self):
+        """Close every idle connection"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+        for wrapper in idle:
+            self._discard(wrapper._raw)
+
+    def stats(self):
+        """Snapshot of pool usage for monitoring"""
+        with self._lock:
+            return {
+                'size': self._size,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'max_size': self.max_size,
+                'acquired_total': self._acquired,
+                'timeouts_total': self._timeouts,
+                'recycled_total': self._recycled,
+                'wait_seconds_total': round(self._wait_total, 6),
+                'wait_seconds_max': round(self._wait_max, 6),
+                'wait_seconds_avg': round(self._wait_total / self._acquired, 6) if self._acquired else 0.0
+            }
+
+
+pool = ConnectionPool()
+
+
 def get_db_connection():
-    """Create and return a database connection"""
+    """Check out a pooled database connection (close() returns it to the pool)"""
     try:
-        conn = psycopg2.connect(
-            host=os.getenv('DB_HOST'),
-            port=os.getenv('DB_PORT'),
-            database=os.getenv('DB_NAME'),
-            user=os.getenv('DB_USER'),
-            password=os.getenv('DB_PASSWORD'),
-            cursor_factory=RealDictCursor
-        )
-        return conn
+        return pool.acquire()
     except Exception as e:
-        print(f"Database connection error: {e}")
+        logger.error("Database connection error", extra={'error': str(e)})
         return None
 
+
+def stream_query(conn, query, params=None, itersize=DB_STREAM_ITERSIZE):
+    """Run query on a server-side (named) cursor and return an iterator of rows
+
+    Rows are pulled from Postgres itersize at a time as the iterator is
+    consumed, so memory stays flat however large the result is. The query
+    itself runs before this returns, so SQL errors raise here rather than
+    mid-iteration. The cursor lives inside the connection's transaction and
+    is closed when the iterator is exhausted or discarded.
+    """
+    cursor = conn.cursor(name=f'stream_{uuid.uuid4().hex}')
+    cursor.itersize = itersize
+    try:
+        cursor.execute(query, params)
+    except Exception:
+        cursor.close()
+        raise
+
+    def rows():
+        try:
+            for row in cursor:
+                yield row
+        finally:
+            try:
+                cursor.close()
+            except psycopg2.Error:
+                pass  # transaction already ended, which closed the cursor server-side
+
+    return rows()
+
+
+def get_pool_stats():
+    """Return connection pool statistics"""
+    return pool.stats()
+
+
 def test_connection():
     """Test if database connection works"""
     conn = get_db_connection()
     if conn:
-        print("✅ Database connected successfully!")
+        logger.info("Database connected successfully")
         conn.close()
         return True
     else:
-        print("❌ Database connection failed!")
-        return False
\ No newline at end of file
+        logger.error("Database connection failed")
+        return False
@@ -0,0 +1,97 @@
+import os
+from flask import make_response, request
+from werkzeug.http import is_resource_modified
+from dotenv import load_dotenv
+from config.database import get_db_connection
+from config.cache import catalog_cache, invalidate_catalog, CATALOG_VERSION_KEY
+from config.logger import get_logger
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+# Conditional GET configuration
+CATALOG_VERSION_TTL = float(os.getenv('CATALOG_VERSION_TTL', 5))    # seconds between version checks
+# max-age=0 + must-revalidate: browsers/CDNs keep the body but ask before reusing it,
+# so an admin edit or an order's stock change is visible on the next load while unchanged pages cost a 304
+CATALOG_CACHE_CONTROL = os.getenv('CATALOG_CACHE_CONTROL', 'public, max-age=0, must-revalidate')
+
+# ETag this worker last saw, to notice writes made through other workers
+_last_etag = None
+
+
+class CatalogVersion:
+    """Validators for the current state of the products table"""
+
+    def __init__(self, last_modified, row_count, stock_version=0):
+        self.last_modified = last_modified
+        self.row_count = row_count
+        self.stock_version = stock_version
+        stamp = int(last_modified.timestamp() * 1000000) if last_modified else 0
+        self.etag = f"catalog-{stamp:x}-{row_count:x}-{stock_version:x}"
+
+
+def catalog_version():
+    """Current CatalogVersion, or None if the database is unreachable
+
+    Every admin edit and import bumps products.updated_at, and every checkout
+    bumps the products_stock_version sequence, so max(updated_at), the row
+    count (for hard deletes) and the sequence value identify the catalog
+    state, stock included. No Last-Modified is sent, since max(updated_at)
+    alone would miss stock changes; the ETag is the only validator. The
+    result is cached for CATALOG_VERSION_TTL seconds and dropped by
+    invalidate_product().
+    When it moves, this worker's cached catalog reads are dropped so bodies
+    never go out under a newer ETag than the data they were built from.
+    """
+    global _last_etag
+    version = catalog_cache.get(CATALOG_VERSION_KEY)
+    if version is not None:
+        return version
+
+    conn = get_db_connection()
+    if not conn:
+        return None
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            SELECT max(updated_at) AS last_modified, count(*) AS row_count,
+                   (SELECT CASE WHEN is_called THEN last_value ELSE 0 END
+                    FROM products_stock_version) AS stock_version
+            FROM products
+        """)
+        row = cursor.fetchone()
+        version = CatalogVersion(row['last_modified'], row['row_count'], row['stock_version'])
+        if _last_etag is not None and version.etag != _last_etag:
+            invalidate_catalog()
+        _last_etag = version.etag
+        catalog_cache.set(CATALOG_VERSION_KEY, version, ttl=CATALOG_VERSION_TTL)
+        return version
+    except Exception:
+        logger.exception("Error reading catalog version")
+        return None
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def not_modified(version):
+    """True if the request's If-None-Match matches version"""
+    if version is None:
+        return False
+    return not is_resource_modified(request.environ, etag=version.etag)
+
+
+def not_modified_response(version):
+    """Empty 304 carrying the same validators a full response would"""
+    return apply_cache_headers(('', 304), version)
+
+
+def apply_cache_headers(response, version):
+    """Attach ETag and Cache-Control for version to response"""
+    response = make_response(response)
+    if version is not None:
+        response.set_etag(version.etag, weak=True)
+        response.headers['Cache-Control'] = CATALOG_CACHE_CONTROL
+    return response
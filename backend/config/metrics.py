@@ -0,0 +1,253 @@
+import bisect
+import threading
+import time
+from flask import Response, g, has_request_context, request
+
+# Histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + (extra or [])
+    if not pairs:
+        return ''
+    escaped = ','.join('{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"')) for k, v in pairs)
+    return '{' + escaped + '}'
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_format_labels(self.labels, label_values)} {value}')
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels"""
+
+    def __init__(self, name, help_text, buckets, labels=()):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self.labels = labels
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for label_values, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    labels = _format_labels(self.labels, label_values, [('le', bound)])
+                    lines.append(f'{self.name}_bucket{labels} {cumulative}')
+                labels = _format_labels(self.labels, label_values, [('le', '+Inf')])
+                lines.append(f'{self.name}_bucket{labels} {count}')
+                labels = _format_labels(self.labels, label_values)
+                lines.append(f'{self.name}_sum{labels} {total}')
+                lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+# Registry
+http_requests = Counter('http_requests_total', 'HTTP requests served',
+                        ('endpoint', 'method', 'status'))
+http_latency = Histogram('http_request_duration_seconds', 'Request latency',
+                         LATENCY_BUCKETS, ('endpoint', 'method'))
+http_response_size = Histogram('http_response_size_bytes', 'Response body size',
+                               SIZE_BUCKETS, ('endpoint',))
+db_queries_per_request = Histogram('db_queries_per_request', 'Database statements executed per request',
+                                   COUNT_BUCKETS, ('endpoint',))
+db_time_per_request = Histogram('db_time_per_request_seconds', 'Cumulative database time per request',
+                                LATENCY_BUCKETS, ('endpoint',))
+db_query_duration = Histogram('db_query_duration_seconds', 'Duration of individual database statements',
+                              LATENCY_BUCKETS)
+db_pool_wait = Histogram('db_pool_wait_seconds', 'Time spent waiting for a pooled connection',
+                         LATENCY_BUCKETS)
+
+REGISTRY = [http_requests, http_latency, http_response_size, db_queries_per_request,
+            db_time_per_request, db_query_duration, db_pool_wait]
+
+# Callables returning {name: value} gauges, evaluated at scrape time
+_gauge_sources = []
+
+
+def register_gauges(prefix, source):
+    """Expose the numeric values of source() as gauges named <prefix>_<key>"""
+    _gauge_sources.append((prefix, source))
+
+
+def record_query(duration):
+    """Account one database statement to the current request"""
+    db_query_duration.observe(duration)
+    if has_request_context():
+        g.db_queries = g.get('db_queries', 0) + 1
+        g.db_time = g.get('db_time', 0.0) + duration
+
+
+def record_pool_wait(duration):
+    """Account time spent waiting for a pooled connection"""
+    db_pool_wait.observe(duration)
+    if has_request_context():
+        g.db_pool_wait = g.get('db_pool_wait', 0.0) + duration
+
+
+class InstrumentedCursor:
+    """Cursor proxy that times every execute() for the metrics above"""
+
+    def __init__(self, cursor):
+        object.__setattr__(self, '_cursor', cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __setattr__(self, name, value):
+        # e.g. itersize / arraysize belong on the real cursor
+        setattr(self._cursor, name, value)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._cursor.close()
+
+    def execute(self, query, params=None):
+        started = time.perf_counter()
+        try:
+            return self._cursor.execute(query, params)
+        finally:
+            record_query(time.perf_counter() - started)
+
+    def executemany(self, query, params_seq):
+        started = time.perf_counter()
+        try:
+            return self._cursor.executemany(query, params_seq)
+        finally:
+            record_query(time.perf_counter() - started)
+
+
+def render_metrics():
+    """Prometheus text exposition of everything registered"""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    for prefix, source in _gauge_sources:
+        for key, value in source().items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                lines.append(f'# TYPE {prefix}_{key} gauge')
+                lines.append(f'{prefix}_{key} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+class CountingBody:
+    """Wraps a streamed response body; reports its size once it is closed
+
+    on_close(size) runs when the server closes the body, i.e. after the last
+    chunk was sent (or the client went away), so it also marks when the
+    request really finished.
+    """
+
+    def __init__(self, body, on_close):
+        self._body = body
+        self._on_close = on_close
+        self.size = 0
+
+    def __iter__(self):
+        for chunk in self._body:
+            self.size += len(chunk.encode('utf-8') if isinstance(chunk, str) else chunk)
+            yield chunk
+
+    def close(self):
+        on_close, self._on_close = self._on_close, None
+        try:
+            if hasattr(self._body, 'close'):
+                self._body.close()
+        finally:
+            if on_close:
+                on_close(self.size)
+
+
+def init_metrics(app, access_check=None):
+    """Time every request and serve the registry at /metrics
+
+    Values are per worker process; scrape each worker or aggregate upstream.
+    access_check() is called before serving /metrics and returns an error
+    response to refuse the request, or None to allow it.
+    """
+
+    @app.before_request
+    def start_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        if 'request_started' not in g:
+            return response
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        elapsed = time.perf_counter() - g.request_started
+        queries = g.get('db_queries', 0)
+        db_time = g.get('db_time', 0.0)
+
+        method = request.method
+        started = g.request_started
+
+        http_requests.inc(endpoint, method, response.status_code)
+        db_queries_per_request.observe(queries, endpoint)
+        db_time_per_request.observe(db_time, endpoint)
+        if response.is_streamed:
+            # Body is produced after this hook returns: measure it as it is sent
+            def finished(size):
+                http_latency.observe(time.perf_counter() - started, endpoint, method)
+                http_response_size.observe(size, endpoint)
+            response.response = CountingBody(response.response, finished)
+        else:
+            http_latency.observe(elapsed, endpoint, method)
+            http_response_size.observe(response.content_length or 0, endpoint)
+
+        # Visible in browser devtools; makes N+1 patterns obvious per request
+        response.headers['Server-Timing'] = (
+            f'db;dur={db_time * 1000:.1f};desc="{queries} queries", '
+            f'pool;dur={g.get("db_pool_wait", 0.0) * 1000:.1f}, '
+            f'total;dur={elapsed * 1000:.1f}'
+        )
+        return response
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        if access_check:
+            error = access_check()
+            if error:
+                return error
+        return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,172 @@
+import hashlib
+import math
+import os
+import threading
+import time
+from flask import jsonify, request
+from dotenv import load_dotenv
+from config.logger import get_logger
+
+try:
+    import redis
+except ImportError:  # optional; only needed for RATE_LIMIT_STORE=redis
+    redis = None
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+# Token buckets: BURST attempts at once, refilled at PER_MINUTE
+RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() != 'false'
+RATE_LIMIT_IP_BURST = int(os.getenv('RATE_LIMIT_IP_BURST', 20))
+RATE_LIMIT_IP_PER_MINUTE = float(os.getenv('RATE_LIMIT_IP_PER_MINUTE', 20))
+RATE_LIMIT_EMAIL_BURST = int(os.getenv('RATE_LIMIT_EMAIL_BURST', 5))
+RATE_LIMIT_EMAIL_PER_MINUTE = float(os.getenv('RATE_LIMIT_EMAIL_PER_MINUTE', 5))
+# memory (per process) or redis (shared by every worker and node)
+RATE_LIMIT_STORE = os.getenv('RATE_LIMIT_STORE', 'memory')
+RATE_LIMIT_REDIS_URL = os.getenv('RATE_LIMIT_REDIS_URL', 'redis://localhost:6379/0')
+RATE_LIMIT_MAX_KEYS = int(os.getenv('RATE_LIMIT_MAX_KEYS', 100000))
+RATE_LIMIT_EVICT_INTERVAL = float(os.getenv('RATE_LIMIT_EVICT_INTERVAL', 60))   # seconds
+# Proxies in front of the app that append to X-Forwarded-For (0 = use the socket address)
+RATE_LIMIT_PROXY_HOPS = int(os.getenv('RATE_LIMIT_PROXY_HOPS', 0))
+
+
+class MemoryBucketStore:
+    """Token buckets in a dict, for a single process
+
+    Keys are 8-byte digests and values (tokens, updated_at, full_at)
+    tuples, so 100k tracked clients take a few MB. Buckets that have refilled
+    completely are indistinguishable from new ones and are dropped every
+    evict_interval; past max_keys the least recently used go first.
+    """
+
+    def __init__(self, max_keys=RATE_LIMIT_MAX_KEYS, evict_interval=RATE_LIMIT_EVICT_INTERVAL):
+        self.max_keys = max_keys
+        self.evict_interval = evict_interval
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._evicted_at = time.monotonic()
+        self.evictions = 0
+
+    def take(self, key, capacity, rate):
+        """Spend one token; returns seconds to wait (0 if allowed)"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at, _ = self._buckets.pop(key, (capacity, now, now))
+            tokens = min(capacity, tokens + (now - updated_at) * rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0
+            else:
+                wait = (1 - tokens) / rate
+            # Re-insert so dict order doubles as LRU order
+            self._buckets[key] = (tokens, now, now + (capacity - tokens) / rate)
+            if now - self._evicted_at >= self.evict_interval or len(self._buckets) > self.max_keys:
+                self._evict(now)
+        return wait
+
+    def _evict(self, now):
+        # Called with the lock held
+        self._evicted_at = now
+        before = len(self._buckets)
+        self._buckets = {key: bucket for key, bucket in self._buckets.items() if bucket[2] > now}
+        if len(self._buckets) > self.max_keys:
+            # Trim to 90% so a flood of new keys does not rescan on every call
+            for key in list(self._buckets)[:len(self._buckets) - self.max_keys * 9 // 10]:
+                del self._buckets[key]
+        self.evictions += before - len(self._buckets)
+
+    def stats(self):
+        return {'keys': len(self._buckets), 'max_keys': self.max_keys, 'evictions': self.evictions}
+
+
+class RedisBucketStore:
+    """Token buckets in Redis, shared across workers and nodes
+
+    One Lua script reads, refills and spends atomically; keys expire once
+    the bucket would be full again.
+    """
+
+    TAKE_SCRIPT = """
+        local capacity = tonumber(ARGV[1])
+        local rate = tonumber(ARGV[2])
+        local now = tonumber(ARGV[3])
+        local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+        local tokens = tonumber(bucket[1]) or capacity
+        local updated_at = tonumber(bucket[2]) or now
+        tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * rate)
+        local wait = 0
+        if tokens >= 1 then
+            tokens = tokens - 1
+        else
+            wait = (1 - tokens) / rate
+        end
+        redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated_at', now)
+        redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate * 1000) + 1000)
+        return tostring(wait)
+    """
+
+    def __init__(self, url=RATE_LIMIT_REDIS_URL, prefix='ratelimit:'):
+        if redis is None:
+            raise RuntimeError('RATE_LIMIT_STORE=redis needs the redis package (pip install redis)')
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self._take = self.client.register_script(self.TAKE_SCRIPT)
+
+    def take(self, key, capacity, rate):
+        """Spend one token; returns seconds to wait (0 if allowed)"""
+        return float(self._take(keys=[self.prefix + key.hex()], args=[capacity, rate, time.time()]))
+
+    def stats(self):
+        return {}
+
+
+def create_store(kind=RATE_LIMIT_STORE):
+    if kind == 'redis':
+        return RedisBucketStore()
+    return MemoryBucketStore()
+
+
+bucket_store = create_store()
+
+
+def bucket_key(scope, value):
+    """Compact key for one client/account in one scope (e.g. login:ip)"""
+    return hashlib.blake2b(f'{scope}:{value}'.encode('utf-8'), digest_size=8).digest()
+
+
+def client_ip():
+    """Caller's address, trusting RATE_LIMIT_PROXY_HOPS X-Forwarded-For entries"""
+    if RATE_LIMIT_PROXY_HOPS > 0:
+        forwarded = [part.strip() for part in request.headers.get('X-Forwarded-For', '').split(',') if part.strip()]
+        if len(forwarded) >= RATE_LIMIT_PROXY_HOPS:
+            return forwarded[-RATE_LIMIT_PROXY_HOPS]
+    return request.remote_addr or 'unknown'
+
+
+def throttle(action, email=None):
+    """429 response if this client (or account) is out of attempts, else None
+
+    Call before any database query or password hash. The per-IP bucket is
+    checked first and the per-email one only if it passes, so one address
+    cannot drain another account's budget faster than its own. Store errors
+    let the request through rather than lock everyone out.
+    """
+    if not RATE_LIMIT_ENABLED:
+        return None
+    rules = [(bucket_key(f'{action}:ip', client_ip()), RATE_LIMIT_IP_BURST, RATE_LIMIT_IP_PER_MINUTE / 60)]
+    if email:
+        rules.append((bucket_key(f'{action}:email', email.strip().lower()),
+                      RATE_LIMIT_EMAIL_BURST, RATE_LIMIT_EMAIL_PER_MINUTE / 60))
+    try:
+        for key, capacity, rate in rules:
+            wait = bucket_store.take(key, capacity, rate)
+            if wait:
+                logger.warning("Throttled", extra={'action': action, 'retry_after': round(wait, 1)})
+                response = jsonify({'error': 'Too many attempts, please try again later'})
+                response.status_code = 429
+                response.headers['Retry-After'] = str(math.ceil(wait))
+                return response
+    except Exception:
+        logger.exception("Rate limit store error")
+    return None
@@ -0,0 +1,179 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from dotenv import load_dotenv
+from config.database import get_db_connection
+from config.logger import get_logger
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+# Revoked-token list configuration
+REVOCATION_REFRESH_INTERVAL = float(os.getenv('REVOCATION_REFRESH_INTERVAL', 2))   # seconds between DB polls
+REVOCATION_PRUNE_INTERVAL = float(os.getenv('REVOCATION_PRUNE_INTERVAL', 3600))   # seconds between prunes
+# Re-read rows this far behind the newest one seen: revoked_at is the inserting
+# transaction's start time, so a slow commit can land "in the past"
+REVOCATION_OVERLAP = timedelta(seconds=float(os.getenv('REVOCATION_OVERLAP', 30)))
+
+
+class RevocationList:
+    """In-memory copy of revoked_tokens (access tokens only), kept current by polling
+
+    is_revoked() is a dict lookup and never touches the database. start()
+    launches a background thread that every refresh_interval pulls only the
+    rows revoked since the last poll, so other workers' logouts show up
+    within that interval; revocations made by this process apply at once.
+    Entries leave memory (and the table) once the token they block has
+    expired, which with short-lived access tokens keeps the set small.
+    If the database is unreachable the last known set keeps being used.
+    """
+
+    def __init__(self, refresh_interval=REVOCATION_REFRESH_INTERVAL, prune_interval=REVOCATION_PRUNE_INTERVAL):
+        self.refresh_interval = refresh_interval
+        self.prune_interval = prune_interval
+        self._revoked = {}          # jti -> exp (unix seconds)
+        self._since = None          # newest revoked_at seen
+        self._pruned_at = time.monotonic()
+        self._thread_pid = None
+        self._start_lock = threading.Lock()
+        self.refreshes = 0
+        self.refresh_errors = 0
+
+    def is_revoked(self, jti):
+        return jti in self._revoked
+
+    def start(self):
+        """Load the list and keep polling it from a daemon thread
+
+        Threads do not survive fork, so this runs once per process: later
+        calls in the same process return at once, and callers arriving
+        during the first load wait for it. Never raises; if the database is
+        down the thread keeps retrying.
+        """
+        if self._thread_pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._thread_pid == os.getpid():
+                return
+            self.refresh()
+            threading.Thread(target=self._poll, name='revocation-refresh', daemon=True).start()
+            self._thread_pid = os.getpid()
+
+    def _poll(self):
+        while True:
+            time.sleep(self.refresh_interval)
+            self.refresh()
+
+    def revoke(self, jti, expires_at):
+        """Record jti as revoked until expires_at (unix seconds)
+
+        Returns True if this call revoked it, False if it already was.
+        Raises on database errors so callers never report a revocation
+        that did not persist.
+        """
+        conn = get_db_connection()
+        if not conn:
+            raise RuntimeError('Database connection failed')
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+                INSERT INTO revoked_tokens (jti, expires_at)
+                VALUES (%s, %s)
+                ON CONFLICT (jti) DO NOTHING
+                RETURNING jti
+            """, (jti, datetime.fromtimestamp(expires_at, timezone.utc)))
+            inserted = cursor.fetchone() is not None
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+        self._revoked[jti] = expires_at
+        return inserted
+
+    def refresh(self):
+        """Pull rows revoked since the last poll (everything on the first)"""
+        conn = get_db_connection()
+        if not conn:
+            self.refresh_errors += 1
+            return
+        cursor = conn.cursor()
+        try:
+            since = self._since - REVOCATION_OVERLAP if self._since else None
+            cursor.execute("""
+                SELECT jti, expires_at, revoked_at FROM revoked_tokens
+                WHERE expires_at > NOW() AND (%s::timestamptz IS NULL OR revoked_at > %s)
+            """, (since, since))
+            for row in cursor.fetchall():
+                self._revoked[row['jti']] = row['expires_at'].timestamp()
+                if self._since is None or row['revoked_at'] > self._since:
+                    self._since = row['revoked_at']
+            conn.commit()
+            self.refreshes += 1
+            if time.monotonic() - self._pruned_at >= self.prune_interval:
+                self._prune(cursor)
+                conn.commit()
+        except Exception:
+            self.refresh_errors += 1
+            conn.rollback()
+            logger.exception("Error refreshing revoked tokens")
+        finally:
+            cursor.close()
+            conn.close()
+
+    def _prune(self, cursor):
+        """Forget entries whose tokens have expired, here and in the table"""
+        self._pruned_at = time.monotonic()
+        now = time.time()
+        for jti, expires_at in list(self._revoked.items()):
+            if expires_at <= now:
+                self._revoked.pop(jti, None)
+        cursor.execute("DELETE FROM revoked_tokens WHERE expires_at < NOW()")
+        if cursor.rowcount:
+            logger.info("Pruned revoked tokens", extra={'rows': cursor.rowcount})
+        cursor.execute("DELETE FROM used_refresh_tokens WHERE expires_at < NOW()")
+        if cursor.rowcount:
+            logger.info("Pruned used refresh tokens", extra={'rows': cursor.rowcount})
+
+    def stats(self):
+        return {
+            'entries': len(self._revoked),
+            'refreshes': self.refreshes,
+            'refresh_errors': self.refresh_errors
+        }
+
+
+def use_refresh_token(jti, expires_at):
+    """Mark a refresh token as spent; False if it already was
+
+    Kept in its own table and checked only here, at /auth/refresh, so a
+    week of rotations per session never lands in the per-request list.
+    Raises on database errors.
+    """
+    conn = get_db_connection()
+    if not conn:
+        raise RuntimeError('Database connection failed')
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            INSERT INTO used_refresh_tokens (jti, expires_at)
+            VALUES (%s, %s)
+            ON CONFLICT (jti) DO NOTHING
+            RETURNING jti
+        """, (jti, datetime.fromtimestamp(expires_at, timezone.utc)))
+        inserted = cursor.fetchone() is not None
+        conn.commit()
+        return inserted
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+
+revocation_list = RevocationList()
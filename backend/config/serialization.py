@@ -0,0 +1,129 @@
+import json
+import os
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from flask import Response, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import http_date
+from dotenv import load_dotenv
+
+try:
+    import orjson
+except ImportError:  # optional speed-up; falls back to the stdlib encoder
+    orjson = None
+
+load_dotenv()
+
+# Rows serialized per chunk written to a streaming response
+STREAM_BATCH_SIZE = int(os.getenv('STREAM_BATCH_SIZE', 200))
+# 'iso' (ISO 8601, naive timestamps marked UTC) or 'http' (Flask's default RFC 822 dates)
+JSON_DATETIME_FORMAT = os.getenv('JSON_DATETIME_FORMAT', 'iso').lower()
+
+
+def _format_datetime(value):
+    if JSON_DATETIME_FORMAT == 'http':
+        return http_date(value)
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.isoformat()
+    return value.isoformat()
+
+
+def _default(value):
+    """Encode the types JSON has no native form for"""
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return _format_datetime(value)
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+    if JSON_DATETIME_FORMAT == 'http':
+        # Route datetimes through _default instead of orjson's native ISO encoder
+        _ORJSON_OPTIONS |= orjson.OPT_PASSTHROUGH_DATETIME
+    else:
+        _ORJSON_OPTIONS |= orjson.OPT_NAIVE_UTC
+
+    def dumps_bytes(obj):
+        """Serialize obj to compact JSON bytes"""
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS)
+else:
+    def dumps_bytes(obj):
+        """Serialize obj to compact JSON bytes"""
+        return json.dumps(obj, default=_default, separators=(',', ':')).encode('utf-8')
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson, with Decimal/datetime handled natively
+
+    Decimal stays a string as with the default provider. Datetimes are ISO 8601
+    unless JSON_DATETIME_FORMAT=http; keys are not sorted.
+    """
+
+    def dumps(self, obj, **kwargs):
+        return dumps_bytes(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s) if orjson is not None else json.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj) + b'\n', mimetype=self.mimetype)
+
+
+def init_json(app):
+    """Install the provider (stdlib-backed when orjson is not installed)"""
+    app.json = FastJSONProvider(app)
+
+
+def iter_json_array(rows, batch_size=STREAM_BATCH_SIZE):
+    """Yield a JSON array as byte chunks, one batch of rows at a time"""
+    yield b'['
+    batch = []
+    first = True
+    for row in rows:
+        batch.append(dumps_bytes(row))
+        if len(batch) >= batch_size:
+            yield (b'' if first else b',') + b','.join(batch)
+            first = False
+            batch = []
+    if batch:
+        yield (b'' if first else b',') + b','.join(batch)
+    yield b']\n'
+
+
+def stream_json_array(rows, cleanup=None, on_complete=None, max_collect_bytes=None):
+    """Streaming application/json response for an iterable of rows
+
+    cleanup() always runs once the body is finished or the client goes away
+    (use it to return the DB connection). on_complete(body_bytes) runs only
+    after a full, successful stream, e.g. to cache the serialized result;
+    it is skipped once the body grows past max_collect_bytes.
+    """
+
+    def generate():
+        chunks = [] if on_complete else None
+        collected = 0
+        try:
+            for chunk in iter_json_array(rows):
+                if chunks is not None:
+                    collected += len(chunk)
+                    if max_collect_bytes is not None and collected > max_collect_bytes:
+                        chunks = None
+                    else:
+                        chunks.append(chunk)
+                yield chunk
+            if chunks is not None:
+                on_complete(b''.join(chunks))
+        finally:
+            # Finish with the row source (e.g. a server-side cursor) before cleanup
+            close = getattr(rows, 'close', None)
+            if close:
+                close()
+            if cleanup:
+                cleanup()
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
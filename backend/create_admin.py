@@ -1,9 +1,9 @@
 from config.database import get_db_connection
-import bcrypt
+from services.passwords import bcrypt_hash
 
 def hash_password(password):
-    """Secure password hashing with bcrypt"""
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    """Secure password hashing with bcrypt at BCRYPT_ROUNDS"""
+    return bcrypt_hash(password)
 
 def create_admin():
     """Create admin account"""
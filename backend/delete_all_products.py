@@ -1,4 +1,20 @@
+"""Wipe catalog data, or purge product images from S3.
+
+    python delete_all_products.py                       # everything: DB rows + all images
+    python delete_all_products.py --s3-only --dry-run   # count what an image purge would delete
+    python delete_all_products.py --orphans             # only images no product references
+    python delete_all_products.py --orphans --min-age-hours 0 --yes
+
+Image deletes are paginated and sent as 1000-key DeleteObjects batches
+across --workers threads; keys S3 fails to delete are retried.
+"""
+import argparse
+from datetime import timedelta
 from config.database import get_db_connection
+from services.media import IMAGES_BUCKET
+from services.uploads import DIRECT_UPLOAD_PREFIX
+from reset_db import truncate_tables, CATALOG_TABLES
+from services.storage_cleanup import iter_objects, referenced_keys, select_orphans, delete_keys
 import boto3
 import os
 from dotenv import load_dotenv
@@ -9,51 +25,90 @@ load_dotenv()
 AWS_ACCESS_KEY = os.getenv('AWS_ACCESS_KEY_ID')
 AWS_SECRET_KEY = os.getenv('AWS_SECRET_ACCESS_KEY')
 AWS_REGION = os.getenv('AWS_REGION', 'us-east-1')
-IMAGES_BUCKET = os.getenv('S3_IMAGES_BUCKET', 'ecommerce-images-ankush-2024')
+S3_ENDPOINT_URL = os.getenv('S3_ENDPOINT_URL') or None
+
+# Everything a full wipe purges: product images and variants, plus pending direct uploads
+IMAGE_PREFIXES = ('products/', f'{DIRECT_UPLOAD_PREFIX}/')
+# Bookkeeping about objects in those prefixes, emptied along with them
+IMAGE_TABLES = ('image_variants', 'upload_jobs')
 
 # Initialize S3 client
 s3_client = boto3.client(
     's3',
     aws_access_key_id=AWS_ACCESS_KEY,
     aws_secret_access_key=AWS_SECRET_KEY,
-    region_name=AWS_REGION
+    region_name=AWS_REGION,
+    endpoint_url=S3_ENDPOINT_URL
 )
 
-def delete_s3_images():
-    """Delete all product images from S3 bucket"""
+
+def _purge(keys, dry_run, workers):
+    """Delete keys and print progress; returns True if nothing failed"""
+    progress = {'batches': 0}
     
-    try:
-        print("\n🗑️  Deleting images from S3...")
-        
-        # List all objects in products/ folder
-        response = s3_client.list_objects_v2(
-            Bucket=IMAGES_BUCKET,
-            Prefix='products/'
-        )
-        
-        if 'Contents' not in response:
-            print("   No images found in S3")
-            return True
-        
-        # Delete all objects
-        objects_to_delete = [{'Key': obj['Key']} for obj in response['Contents']]
-        
-        if objects_to_delete:
-            s3_client.delete_objects(
-                Bucket=IMAGES_BUCKET,
-                Delete={'Objects': objects_to_delete}
-            )
-            
-            print(f"   ✅ Deleted {len(objects_to_delete)} images from S3")
-        
+    def on_batch(deleted, errors):
+        progress['batches'] += 1
+        if progress['batches'] % 10 == 0:
+            print(f"   ... {progress['batches']} batches")
+    
+    result = delete_keys(s3_client, IMAGES_BUCKET, keys, workers=workers, dry_run=dry_run, on_batch=on_batch)
+    
+    if dry_run:
+        print(f"   🔎 Dry run: would delete {result['deleted']} images")
         return True
+    
+    print(f"   ✅ Deleted {result['deleted']} images from S3")
+    if result['failed']:
+        print(f"   ❌ {len(result['failed'])} images could not be deleted:")
+        for error in result['failed'][:20]:
+            print(f"      {error['Key']}: {error.get('Code')} {error.get('Message', '')}")
+        return False
+    return True
+
+
+def delete_s3_images(dry_run=False, workers=8, prefix='products/'):
+    """Delete every product image under prefix from the S3 bucket"""
+    
+    try:
+        print(f"\n🗑️  Deleting images from s3://{IMAGES_BUCKET}/{prefix} ...")
+        keys = (obj['Key'] for obj in iter_objects(s3_client, IMAGES_BUCKET, prefix))
+        return _purge(keys, dry_run, workers)
         
     except Exception as e:
         print(f"   ❌ Error deleting S3 images: {e}")
         return False
 
 
-def delete_database_data():
+def delete_orphan_images(dry_run=False, workers=8, prefix='products/', min_age_hours=24):
+    """Delete images (and their size variants) no product references
+
+    Objects newer than min_age_hours are kept: they may belong to an upload
+    whose product has not been created yet.
+    """
+    
+    conn = get_db_connection()
+    if not conn:
+        print("❌ Failed to connect to database")
+        return False
+    
+    try:
+        keys = referenced_keys(conn)
+    finally:
+        conn.close()
+    
+    try:
+        print(f"\n🗑️  Deleting unreferenced images from s3://{IMAGES_BUCKET}/{prefix} "
+              f"({len(keys)} referenced, older than {min_age_hours}h) ...")
+        min_age = timedelta(hours=min_age_hours) if min_age_hours else None
+        orphans = select_orphans(iter_objects(s3_client, IMAGES_BUCKET, prefix), keys, min_age)
+        return _purge(orphans, dry_run, workers)
+        
+    except Exception as e:
+        print(f"   ❌ Error deleting orphaned S3 images: {e}")
+        return False
+
+
+def delete_database_data(tables=CATALOG_TABLES):
     """Delete all products, orders, cart items, and order items from database"""
     
     conn = get_db_connection()
@@ -66,36 +121,11 @@ def delete_database_data():
     try:
         print("\n🗑️  Deleting data from database...")
         
-        # Delete in correct order (respecting foreign keys)
-        
-        # 1. Delete order items first
-        cursor.execute("DELETE FROM order_items")
-        deleted_order_items = cursor.rowcount
-        print(f"   ✅ Deleted {deleted_order_items} order items")
-        
-        # 2. Delete orders
-        cursor.execute("DELETE FROM orders")
-        deleted_orders = cursor.rowcount
-        print(f"   ✅ Deleted {deleted_orders} orders")
-        
-        # 3. Delete cart items
-        cursor.execute("DELETE FROM cart")
-        deleted_cart = cursor.rowcount
-        print(f"   ✅ Deleted {deleted_cart} cart items")
-        
-        # 4. Finally delete products
-        cursor.execute("DELETE FROM products")
-        deleted_products = cursor.rowcount
-        print(f"   ✅ Deleted {deleted_products} products")
-        
-        # Reset ID sequences
-        cursor.execute("ALTER SEQUENCE products_id_seq RESTART WITH 1")
-        cursor.execute("ALTER SEQUENCE orders_id_seq RESTART WITH 1")
-        cursor.execute("ALTER SEQUENCE order_items_id_seq RESTART WITH 1")
-        cursor.execute("ALTER SEQUENCE cart_id_seq RESTART WITH 1")
-        print("   ✅ Reset all ID counters")
-        
+        # One TRUNCATE: no per-row work, no dead tuples, ids restart at 1
+        truncate_tables(cursor, tables)
         conn.commit()
+        print(f"   ✅ Truncated {', '.join(tables)}")
+        print("   ✅ Reset all ID counters")
         
         return True
         
@@ -109,18 +139,21 @@ def delete_database_data():
         conn.close()
 
 
-def delete_all_data():
+def delete_all_data(dry_run=False, workers=8):
     """Delete everything: database data + S3 images"""
     
     print("\n" + "="*60)
     print("   COMPLETE DATA DELETION")
     print("="*60)
     
-    # Delete S3 images first
-    s3_success = delete_s3_images()
+    if dry_run:
+        return all([delete_s3_images(dry_run=True, workers=workers, prefix=prefix) for prefix in IMAGE_PREFIXES])
+    
+    # Delete S3 images first (every prefix, even if one fails)
+    s3_success = all([delete_s3_images(workers=workers, prefix=prefix) for prefix in IMAGE_PREFIXES])
     
     # Delete database data
-    db_success = delete_database_data()
+    db_success = delete_database_data(CATALOG_TABLES + IMAGE_TABLES)
     
     if s3_success and db_success:
         print("\n" + "="*60)
@@ -137,6 +170,39 @@ def delete_all_data():
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Delete catalog data and/or product images')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--s3-only', action='store_true', help='purge images only, keep the database')
+    mode.add_argument('--orphans', action='store_true', help='purge only images no product references')
+    parser.add_argument('--dry-run', action='store_true', help='report what would be deleted')
+    parser.add_argument('--workers', type=int, default=8, help='parallel DeleteObjects calls')
+    parser.add_argument('--prefix', default='products/', help='S3 key prefix to purge')
+    parser.add_argument('--min-age-hours', type=float, default=24,
+                        help='with --orphans, keep images newer than this')
+    parser.add_argument('--yes', action='store_true', help='skip the confirmation prompt')
+    args = parser.parse_args()
+    
+    if args.orphans:
+        if not (args.dry_run or args.yes):
+            confirmation = input("Delete all unreferenced product images? Type 'yes' to confirm: ")
+            if confirmation != 'yes':
+                print("\n❌ Deletion cancelled - nothing was deleted")
+                raise SystemExit(1)
+        ok = delete_orphan_images(args.dry_run, args.workers, args.prefix, args.min_age_hours)
+        raise SystemExit(0 if ok else 1)
+    
+    if args.s3_only:
+        if not (args.dry_run or args.yes):
+            confirmation = input(f"Delete ALL images under {args.prefix}? Type 'DELETE IMAGES' to confirm: ")
+            if confirmation != 'DELETE IMAGES':
+                print("\n❌ Deletion cancelled - nothing was deleted")
+                raise SystemExit(1)
+        ok = delete_s3_images(args.dry_run, args.workers, args.prefix)
+        raise SystemExit(0 if ok else 1)
+    
+    if args.dry_run:
+        raise SystemExit(0 if delete_all_data(dry_run=True, workers=args.workers) else 1)
+    
     print("\n" + "="*60)
     print("⚠️  DANGER ZONE - COMPLETE DATA WIPE ⚠️")
     print("="*60)
@@ -145,14 +211,14 @@ if __name__ == '__main__':
     print("  ❌ All orders from database")
     print("  ❌ All order items from database")
     print("  ❌ All cart items from database")
-    print("  ❌ All product images from S3 bucket")
+    print("  ❌ All product images and pending uploads from S3 bucket")
     print("\n" + "="*60)
     print("⚠️  THIS ACTION CANNOT BE UNDONE!")
     print("="*60 + "\n")
     
-    confirmation = input("Type 'DELETE EVERYTHING' to confirm: ")
+    confirmation = 'DELETE EVERYTHING' if args.yes else input("Type 'DELETE EVERYTHING' to confirm: ")
     
     if confirmation == 'DELETE EVERYTHING':
-        delete_all_data()
+        delete_all_data(workers=args.workers)
     else:
-        print("\n❌ Deletion cancelled - nothing was deleted")
\ No newline at end of file
+        print("\n❌ Deletion cancelled - nothing was deleted")
@@ -0,0 +1,56 @@
+"""Gunicorn settings for production.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Every value can be overridden from the environment (see below) or on the
+command line. Workers are preforked from a master that has already
+imported the app (preload_app), so boto3, Pillow and the route modules
+are loaded once and shared copy-on-write. Each worker then warms its own
+DB pool and caches before it accepts a connection.
+"""
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:3000')
+
+# sync: one request per process, safest for CPU-bound work.
+# gthread: GUNICORN_THREADS requests per process on OS threads.
+# gevent: many concurrent requests per process; needs `pip install gevent psycogreen`
+#         so psycopg2 waits cooperatively, and is run without preload (see below).
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'sync')
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('GUNICORN_THREADS', 1))
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 1000))   # gevent only
+
+# gevent must monkey-patch before sockets and ssl are imported, which
+# preloading in the master would defeat
+preload_app = os.getenv('GUNICORN_PRELOAD', 'false' if worker_class == 'gevent' else 'true').lower() == 'true'
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 60))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+# Recycle workers now and then so slow leaks cannot accumulate; jitter avoids all restarting at once
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 5000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 500))
+
+# One line per request on stdout; the app log has no per-request lines of its own.
+# Set GUNICORN_ACCESS_LOG to a file path to redirect it, or to an empty value to turn it off
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-') or None
+errorlog = '-'
+loglevel = os.getenv('LOG_LEVEL', 'info').lower()
+
+
+def post_fork(server, worker):
+    if worker_class == 'gevent':
+        try:
+            from psycogreen.gevent import patch_psycopg
+        except ImportError:
+            server.log.warning("psycogreen not installed; database calls will block gevent workers")
+        else:
+            patch_psycopg()
+
+
+def post_worker_init(worker):
+    # Runs in the worker after the app is loaded and before it accepts connections
+    from app import warm_up
+    warm_up(worker.wsgi)
@@ -0,0 +1,81 @@
+"""Bulk load or dump the product catalog.
+
+    python import_products.py catalog.csv               # insert/update from CSV (header row required)
+    python import_products.py catalog.jsonl --dry-run   # validate only, report errors
+    python import_products.py --export products.csv     # dump every product (.csv or .jsonl)
+
+Rows with a sku that already exists update that product; everything else
+is inserted. Columns: sku, name, description, price, category, stock,
+image_key, is_active (name, price and category are required).
+"""
+import argparse
+import sys
+import time
+from config.database import create_connection, stream_query
+from services.bulk_products import import_products, iter_export, EXPORT_COLUMNS
+
+
+def detect_format(path, explicit=None):
+    if explicit:
+        return explicit
+    return 'jsonl' if path.lower().endswith(('.jsonl', '.ndjson')) else 'csv'
+
+
+def run_import(path, file_format, dry_run):
+    conn = create_connection()
+    started = time.perf_counter()
+    try:
+        with open(path, encoding='utf-8-sig', newline='') as text_stream:
+            report = import_products(conn, text_stream, file_format, dry_run=dry_run)
+    finally:
+        conn.close()
+    elapsed = time.perf_counter() - started
+
+    loaded = report['inserted'] + report['updated']
+    verb = 'Validated' if dry_run else 'Imported'
+    print(f"✅ {verb} {loaded} product(s): {report['inserted']} new, {report['updated']} updated "
+          f"in {elapsed:.2f}s ({loaded / elapsed:.0f} rows/s)")
+    if report['rejected']:
+        print(f"⚠️  Rejected {report['rejected']} row(s):")
+        for error in report['errors']:
+            print(f"   line {error['line']}: {error['error']}")
+        if report['errors_truncated']:
+            print(f"   ... {report['rejected'] - len(report['errors'])} more")
+    return report['rejected'] == 0
+
+
+def run_export(path, file_format):
+    conn = create_connection()
+    count = 0
+    try:
+        rows = stream_query(conn, f"SELECT {', '.join(EXPORT_COLUMNS)} FROM products ORDER BY id")
+
+        def counted():
+            nonlocal count
+            for row in rows:
+                count += 1
+                yield row
+
+        with open(path, 'wb') as output:
+            for chunk in iter_export(counted(), file_format):
+                output.write(chunk)
+    finally:
+        conn.close()
+    print(f"✅ Exported {count} product(s) to {path}")
+    return True
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Bulk import/export products')
+    parser.add_argument('path', help='file to import (or write with --export)')
+    parser.add_argument('--export', action='store_true', help='dump products to path instead of importing')
+    parser.add_argument('--format', choices=('csv', 'jsonl'), help='default: from the file extension')
+    parser.add_argument('--dry-run', action='store_true', help='validate and report without saving')
+    args = parser.parse_args()
+
+    file_format = detect_format(args.path, args.format)
+    if args.export:
+        ok = run_export(args.path, file_format)
+    else:
+        ok = run_import(args.path, file_format, args.dry_run)
+    sys.exit(0 if ok else 1)
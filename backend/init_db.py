@@ -1,87 +0,0 @@
-from config.database import get_db_connection
-
-def create_tables():
-    """Create all database tables"""
-    
-    conn = get_db_connection()
-    if not conn:
-        print("❌ Failed to connect to database")
-        return False
-    
-    cursor = conn.cursor()
-    
-    try:
-        # Create products table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS products (
-                id SERIAL PRIMARY KEY,
-                name VARCHAR(255) NOT NULL,
-                description TEXT,
-                price DECIMAL(10, 2) NOT NULL,
-                category VARCHAR(100),
-                stock INTEGER DEFAULT 0,
-                image_key VARCHAR(512),
-                is_active BOOLEAN DEFAULT true,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            );
-        """)
-        print("✅ Products table created")
-        
-        # Create cart table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS cart (
-                id SERIAL PRIMARY KEY,
-                user_id VARCHAR(255) NOT NULL,
-                product_id INTEGER REFERENCES products(id),
-                quantity INTEGER DEFAULT 1,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(user_id, product_id)
-            );
-        """)
-        print("✅ Cart table created")
-        
-        # Create orders table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS orders (
-                id SERIAL PRIMARY KEY,
-                user_id VARCHAR(255) NOT NULL,
-                total_amount DECIMAL(10, 2) NOT NULL,
-                status VARCHAR(50) DEFAULT 'pending',
-                shipping_address TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            );
-        """)
-        print("✅ Orders table created")
-        
-        # Create order_items table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS order_items (
-                id SERIAL PRIMARY KEY,
-                order_id INTEGER REFERENCES orders(id),
-                product_id INTEGER REFERENCES products(id),
-                quantity INTEGER NOT NULL,
-                price DECIMAL(10, 2) NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            );
-        """)
-        print("✅ Order items table created")
-        
-        # Commit changes
-        conn.commit()
-        print("\n🎉 All tables created successfully!")
-        
-        return True
-        
-    except Exception as e:
-        print(f"❌ Error creating tables: {e}")
-        conn.rollback()
-        return False
-        
-    finally:
-        cursor.close()
-        conn.close()
-
-if __name__ == '__main__':
-    create_tables()
\ No newline at end of file
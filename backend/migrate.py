@@ -0,0 +1,393 @@
+"""Versioned schema migrations.
+
+Usage:
+    python migrate.py                  # apply pending migrations
+    python migrate.py --concurrently   # build indexes without blocking writes (live databases)
+    python migrate.py --status         # list applied and pending versions
+
+Each migration runs once and is recorded in schema_migrations. Index
+migrations write their statements with a {concurrently} placeholder; with
+--concurrently they run outside a transaction as CREATE INDEX CONCURRENTLY.
+"""
+import argparse
+from config.database import create_connection
+from services.search import SEARCH_VECTOR_SQL
+
+# Arbitrary key for pg_advisory_lock so two runners never interleave
+MIGRATION_LOCK_ID = 7305001
+
+MIGRATIONS = [
+    {
+        'version': 1,
+        'name': 'create catalog, cart and order tables',
+        'statements': [
+            """
+            CREATE TABLE IF NOT EXISTS products (
+                id SERIAL PRIMARY KEY,
+                name VARCHAR(255) NOT NULL,
+                description TEXT,
+                price DECIMAL(10, 2) NOT NULL,
+                category VARCHAR(100),
+                stock INTEGER DEFAULT 0,
+                image_key VARCHAR(512),
+                is_active BOOLEAN DEFAULT true,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS cart (
+                id SERIAL PRIMARY KEY,
+                user_id VARCHAR(255) NOT NULL,
+                product_id INTEGER REFERENCES products(id),
+                quantity INTEGER DEFAULT 1,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE(user_id, product_id)
+            );
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS orders (
+                id SERIAL PRIMARY KEY,
+                user_id VARCHAR(255) NOT NULL,
+                total_amount DECIMAL(10, 2) NOT NULL,
+                status VARCHAR(50) DEFAULT 'pending',
+                shipping_address TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS order_items (
+                id SERIAL PRIMARY KEY,
+                order_id INTEGER REFERENCES orders(id),
+                product_id INTEGER REFERENCES products(id),
+                quantity INTEGER NOT NULL,
+                price DECIMAL(10, 2) NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+            """
+        ]
+    },
+    {
+        'version': 2,
+        'name': 'create users table',
+        'statements': [
+            """
+            CREATE TABLE IF NOT EXISTS users (
+                id SERIAL PRIMARY KEY,
+                name VARCHAR(255) NOT NULL,
+                email VARCHAR(255) UNIQUE NOT NULL,
+                password VARCHAR(255) NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+            """
+        ]
+    },
+    {
+        'version': 3,
+        'name': 'add users.is_admin',
+        'statements': [
+            "ALTER TABLE users ADD COLUMN IF NOT EXISTS is_admin BOOLEAN DEFAULT false;"
+        ]
+    },
+    {
+        'version': 4,
+        'name': 'products full-text search column',
+        'statements': [
+            "ALTER TABLE products ADD COLUMN IF NOT EXISTS search_vector tsvector;",
+            f"UPDATE products SET search_vector = {SEARCH_VECTOR_SQL} WHERE search_vector IS NULL;"
+        ]
+    },
+    {
+        'version': 5,
+        'name': 'products full-text search index',
+        'index': True,
+        'statements': [
+            "CREATE INDEX {concurrently} IF NOT EXISTS idx_products_search_vector "
+            "ON products USING GIN (search_vector);"
+        ]
+    },
+    {
+        'version': 6,
+        'name': 'products trigram name index',
+        'index': True,
+        # pg_trgm is not installed everywhere; search works without it
+        'optional': True,
+        'statements': [
+            "CREATE EXTENSION IF NOT EXISTS pg_trgm;",
+            "CREATE INDEX {concurrently} IF NOT EXISTS idx_products_name_trgm "
+            "ON products USING GIN (name gin_trgm_ops);"
+        ]
+    },
+    {
+        'version': 7,
+        'name': 'indexes for hot query predicates',
+        'index': True,
+        'statements': [
+            # get_products: active listing ordered by (created_at, id), keyset pagination
+            "CREATE INDEX {concurrently} IF NOT EXISTS idx_products_active_created "
+            "ON products (created_at DESC, id DESC) WHERE is_active = true;",
+            # get_products?category= and get_categories
+            "CREATE INDEX {concurrently} IF NOT EXISTS idx_products_active_category_created "
+            "ON products (category, created_at DESC, id DESC) WHERE is_active = true;",
+            # get_orders: a user's orders, newest first
+            "CREATE INDEX {concurrently} IF NOT EXISTS idx_orders_user_created "
+            "ON orders (user_id, created_at DESC);",
+            # get_order: items of one order
+            "CREATE INDEX {concurrently} IF NOT EXISTS idx_order_items_order "
+            "ON order_items (order_id);"
+        ]
+    },
+    {
+        'version': 8,
+        'name': 'products updated_at index',
+        'index': True,
+        'statements': [
+            # catalog_version(): max(updated_at) behind the catalog ETag
+            "CREATE INDEX {concurrently} IF NOT EXISTS idx_products_updated_at "
+            "ON products (updated_at);"
+        ]
+    },
+    {
+        'version': 9,
+        'name': 'products sku column',
+        'statements': [
+            # Stable external identifier; bulk imports upsert on it
+            "ALTER TABLE products ADD COLUMN IF NOT EXISTS sku VARCHAR(64);"
+        ]
+    },
+    {
+        'version': 10,
+        'name': 'products sku unique index',
+        'index': True,
+        'statements': [
+            "CREATE UNIQUE INDEX {concurrently} IF NOT EXISTS idx_products_sku "
+            "ON products (sku);"
+        ]
+    },
+    {
+        'version': 11,
+        'name': 'revoked tokens table',
+        'statements': [
+            """
+            CREATE TABLE IF NOT EXISTS revoked_tokens (
+                jti VARCHAR(64) PRIMARY KEY,
+                expires_at TIMESTAMPTZ NOT NULL,
+                revoked_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+            );
+            """,
+            # Incremental refresh reads rows newer than the last one seen
+            "CREATE INDEX IF NOT EXISTS idx_revoked_tokens_revoked_at ON revoked_tokens (revoked_at);",
+            # Pruning deletes rows whose token has expired anyway
+            "CREATE INDEX IF NOT EXISTS idx_revoked_tokens_expires_at ON revoked_tokens (expires_at);"
+        ]
+    },
+    {
+        'version': 12,
+        'name': 'stock version counter',
+        'statements': [
+            # Bumped by every checkout so the catalog ETag follows stock without touching updated_at
+            "CREATE SEQUENCE IF NOT EXISTS products_stock_version;"
+        ]
+    },
+    {
+        'version': 13,
+        'name': 'used refresh tokens table',
+        'statements': [
+            # Refresh tokens are only checked at /auth/refresh, so they stay out of
+            # revoked_tokens (which every worker mirrors in memory)
+            """
+            CREATE TABLE IF NOT EXISTS used_refresh_tokens (
+                jti VARCHAR(64) PRIMARY KEY,
+                expires_at TIMESTAMPTZ NOT NULL
+            );
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_used_refresh_tokens_expires_at ON used_refresh_tokens (expires_at);"
+        ]
+    },
+    {
+        'version': 14,
+        'name': 'image variants registry',
+        'statements': [
+            # Which WebP size variants were stored for an image; imageVariants only lists these
+            """
+            CREATE TABLE IF NOT EXISTS image_variants (
+                image_key VARCHAR(512) PRIMARY KEY,
+                variants TEXT[] NOT NULL,
+                created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+            );
+            """
+        ]
+    },
+    {
+        'version': 15,
+        'name': 'upload jobs table',
+        'statements': [
+            # Background upload status, readable from every worker
+            """
+            CREATE TABLE IF NOT EXISTS upload_jobs (
+                id VARCHAR(32) PRIMARY KEY,
+                status VARCHAR(16) NOT NULL,
+                image_key VARCHAR(512) NOT NULL,
+                size BIGINT NOT NULL,
+                variants JSONB NOT NULL DEFAULT jsonb_build_object(),
+                error TEXT,
+                created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                finished_at TIMESTAMPTZ
+            );
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_upload_jobs_created_at ON upload_jobs (created_at);"
+        ]
+    }
+]
+
+
+def ensure_migrations_table(cursor):
+    """Create the bookkeeping table if needed"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+
+
+def applied_versions(cursor):
+    """Set of versions already recorded"""
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row['version'] for row in cursor.fetchall()}
+
+
+def drop_invalid_indexes(cursor):
+    """Drop indexes left INVALID by an interrupted CREATE INDEX CONCURRENTLY"""
+    cursor.execute("""
+        SELECT c.relname AS name
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE NOT i.indisvalid AND n.nspname = current_schema()
+    """)
+    for row in cursor.fetchall():
+        print(f"   ⚠️ Dropping invalid index {row['name']}")
+        cursor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{row["name"]}"')
+
+
+def apply_migration(conn, migration, concurrently=False):
+    """Run one migration and record it; returns 'applied', 'skipped' or 'failed'"""
+    use_concurrently = concurrently and migration.get('index', False)
+    cursor = conn.cursor()
+
+    try:
+        if use_concurrently:
+            # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+            conn.autocommit = True
+            drop_invalid_indexes(cursor)
+
+        for statement in migration['statements']:
+            cursor.execute(statement.format(concurrently='CONCURRENTLY' if use_concurrently else ''))
+
+        cursor.execute(
+            "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+            (migration['version'], migration['name'])
+        )
+
+        if not use_concurrently:
+            conn.commit()
+
+        print(f"✅ {migration['version']:>3}  {migration['name']}")
+        return 'applied'
+
+    except Exception as e:
+        if not use_concurrently:
+            conn.rollback()
+        if migration.get('optional'):
+            # Not recorded, so it is retried on the next run
+            print(f"⚠️ {migration['version']:>3}  {migration['name']} skipped: {e}")
+            return 'skipped'
+        print(f"❌ {migration['version']:>3}  {migration['name']} failed: {e}")
+        return 'failed'
+
+    finally:
+        conn.autocommit = False
+        cursor.close()
+
+
+def run_migrations(concurrently=False):
+    """Apply every pending migration in version order"""
+
+    try:
+        conn = create_connection()
+    except Exception as e:
+        print(f"❌ Failed to connect to database: {e}")
+        return False
+
+    cursor = conn.cursor()
+
+    try:
+        ensure_migrations_table(cursor)
+        conn.commit()
+
+        # Session-level lock survives the per-migration commits
+        cursor.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_ID,))
+        conn.commit()
+
+        done = applied_versions(cursor)
+        conn.commit()
+        pending = [m for m in sorted(MIGRATIONS, key=lambda m: m['version']) if m['version'] not in done]
+
+        if not pending:
+            print("✅ Database schema is up to date")
+            return True
+
+        applied = 0
+        for migration in pending:
+            result = apply_migration(conn, migration, concurrently)
+            if result == 'failed':
+                return False
+            if result == 'applied':
+                applied += 1
+
+        print(f"\n🎉 Applied {applied} migration(s)")
+        return True
+
+    finally:
+        try:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_ID,))
+            conn.commit()
+        except Exception:
+            pass
+        cursor.close()
+        conn.close()
+
+
+def show_status():
+    """Print applied and pending migrations"""
+
+    conn = create_connection()
+    cursor = conn.cursor()
+
+    try:
+        ensure_migrations_table(cursor)
+        conn.commit()
+        done = applied_versions(cursor)
+        for migration in sorted(MIGRATIONS, key=lambda m: m['version']):
+            mark = '✅' if migration['version'] in done else '⏳'
+            print(f"{mark} {migration['version']:>3}  {migration['name']}")
+
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Apply database schema migrations')
+    parser.add_argument('--concurrently', action='store_true',
+                        help='build indexes with CREATE INDEX CONCURRENTLY (no write locks)')
+    parser.add_argument('--status', action='store_true', help='list migration status and exit')
+    args = parser.parse_args()
+
+    if args.status:
+        show_status()
+    else:
+        run_migrations(concurrently=args.concurrently)
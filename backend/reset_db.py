@@ -0,0 +1,234 @@
+"""Reset the database for tests and load runs, and save/restore fixtures.
+
+    python reset_db.py truncate [--users]          # empty catalog/cart/orders, restart ids
+    python reset_db.py snapshot fixtures/seeded    # COPY every data table to a directory
+    python reset_db.py restore fixtures/seeded     # truncate + COPY back in, fix sequences
+    python reset_db.py save-template shop_seeded   # clone the database into a template
+    python reset_db.py from-template shop_seeded   # recreate DB_NAME from that template
+
+truncate, restore and from-template destroy data in DB_NAME and ask for
+confirmation first; pass --yes to skip the prompt in scripts and CI.
+
+TRUNCATE and COPY finish in seconds where row-by-row DELETE/INSERT take
+minutes and leave dead tuples behind. Snapshots are binary COPY files,
+so restore them into the same schema version they were taken from.
+Template cloning is faster still (a file-level copy) but needs CREATEDB,
+and it disconnects every other session on both databases while it runs.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from psycopg2 import sql
+from dotenv import load_dotenv
+from config.database import create_connection
+
+load_dotenv()
+
+# Data tables in foreign-key order (parents first); truncation handles them together
+DATA_TABLES = ('users', 'products', 'orders', 'order_items', 'cart')
+CATALOG_TABLES = ('products', 'orders', 'order_items', 'cart')
+MAINTENANCE_DB = os.getenv('DB_MAINTENANCE_NAME', 'postgres')
+
+
+def truncate_tables(cursor, tables):
+    """Empty tables in one statement and restart their id sequences"""
+    cursor.execute(sql.SQL("TRUNCATE {} RESTART IDENTITY CASCADE").format(
+        sql.SQL(', ').join(map(sql.Identifier, tables))
+    ))
+
+
+def reset_sequences(cursor, tables):
+    """Point each table's id sequence past its largest id"""
+    for table in tables:
+        cursor.execute(sql.SQL(
+            "SELECT setval(pg_get_serial_sequence(%s, 'id'), COALESCE(MAX(id), 0) + 1, false) FROM {}"
+        ).format(sql.Identifier(table)), (table,))
+
+
+def truncate(include_users=False):
+    """Empty the catalog, carts and orders (and users with include_users)"""
+    tables = DATA_TABLES if include_users else CATALOG_TABLES
+    conn = create_connection()
+    cursor = conn.cursor()
+    try:
+        started = time.perf_counter()
+        truncate_tables(cursor, tables)
+        conn.commit()
+        print(f"✅ Truncated {', '.join(tables)} in {time.perf_counter() - started:.2f}s")
+        return True
+    except Exception as e:
+        print(f"❌ Error truncating tables: {e}")
+        conn.rollback()
+        return False
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def snapshot(directory):
+    """Write every data table to directory as binary COPY files plus a manifest"""
+    os.makedirs(directory, exist_ok=True)
+    conn = create_connection()
+    conn.set_session(isolation_level='REPEATABLE READ', readonly=True)  # one consistent view
+    cursor = conn.cursor()
+    manifest = {'tables': {}, 'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())}
+    try:
+        started = time.perf_counter()
+        for table in DATA_TABLES:
+            with open(os.path.join(directory, f'{table}.copy'), 'wb') as output:
+                cursor.copy_expert(
+                    sql.SQL("COPY {} TO STDOUT WITH (FORMAT binary)").format(sql.Identifier(table)).as_string(conn),
+                    output
+                )
+            cursor.execute(sql.SQL("SELECT count(*) AS n FROM {}").format(sql.Identifier(table)))
+            manifest['tables'][table] = cursor.fetchone()['n']
+        with open(os.path.join(directory, 'manifest.json'), 'w') as output:
+            json.dump(manifest, output, indent=2)
+        conn.rollback()
+        rows = sum(manifest['tables'].values())
+        print(f"✅ Snapshot of {rows} rows written to {directory} in {time.perf_counter() - started:.2f}s")
+        return True
+    except Exception as e:
+        print(f"❌ Error writing snapshot: {e}")
+        return False
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def restore(directory):
+    """Replace all data with a snapshot in one transaction"""
+    with open(os.path.join(directory, 'manifest.json')) as manifest_file:
+        manifest = json.load(manifest_file)
+    tables = [table for table in DATA_TABLES if table in manifest['tables']]
+
+    conn = create_connection()
+    cursor = conn.cursor()
+    try:
+        started = time.perf_counter()
+        truncate_tables(cursor, tables)
+        for table in tables:
+            with open(os.path.join(directory, f'{table}.copy'), 'rb') as source:
+                cursor.copy_expert(
+                    sql.SQL("COPY {} FROM STDIN WITH (FORMAT binary)").format(sql.Identifier(table)).as_string(conn),
+                    source
+                )
+        reset_sequences(cursor, tables)
+        conn.commit()
+        # Fresh statistics so the first queries after a restore plan well
+        conn.autocommit = True
+        for table in tables:
+            cursor.execute(sql.SQL("ANALYZE {}").format(sql.Identifier(table)))
+        rows = sum(manifest['tables'][table] for table in tables)
+        print(f"✅ Restored {rows} rows from {directory} in {time.perf_counter() - started:.2f}s")
+        return True
+    except Exception as e:
+        print(f"❌ Error restoring snapshot: {e}")
+        conn.rollback()
+        return False
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def _clone_database(source, target):
+    """DROP target and CREATE it as a copy of source, from the maintenance DB"""
+    conn = create_connection(MAINTENANCE_DB)
+    conn.autocommit = True  # CREATE/DROP DATABASE cannot run in a transaction
+    cursor = conn.cursor()
+    try:
+        # CREATE DATABASE .. TEMPLATE fails while anyone is connected to the source
+        cursor.execute("""
+            SELECT pg_terminate_backend(pid) FROM pg_stat_activity
+            WHERE datname IN (%s, %s) AND pid <> pg_backend_pid()
+        """, (source, target))
+        cursor.execute(sql.SQL("DROP DATABASE IF EXISTS {}").format(sql.Identifier(target)))
+        cursor.execute(sql.SQL("CREATE DATABASE {} TEMPLATE {}").format(
+            sql.Identifier(target), sql.Identifier(source)
+        ))
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def save_template(template):
+    """Clone DB_NAME into template (replacing any previous copy)"""
+    database = os.getenv('DB_NAME')
+    try:
+        started = time.perf_counter()
+        _clone_database(database, template)
+        print(f"✅ Saved {database} as template {template} in {time.perf_counter() - started:.2f}s")
+        return True
+    except Exception as e:
+        print(f"❌ Error saving template: {e}")
+        return False
+
+
+def from_template(template):
+    """Recreate DB_NAME as a fresh copy of template"""
+    database = os.getenv('DB_NAME')
+    if database == MAINTENANCE_DB:
+        print(f"❌ Refusing to recreate the maintenance database {MAINTENANCE_DB}; set DB_MAINTENANCE_NAME")
+        return False
+    try:
+        started = time.perf_counter()
+        _clone_database(template, database)
+        print(f"✅ Recreated {database} from template {template} in {time.perf_counter() - started:.2f}s")
+        return True
+    except Exception as e:
+        print(f"❌ Error restoring from template: {e}")
+        return False
+
+
+def confirmed(action, yes=False):
+    """Ask before destroying data in DB_NAME unless --yes was given"""
+    if yes:
+        return True
+    database = os.getenv('DB_NAME')
+    confirmation = input(f"{action} in database {database}? Type '{database}' to confirm: ")
+    if confirmation != database:
+        print("\n❌ Cancelled - nothing was changed")
+        return False
+    return True
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Reset the database or save/restore fixtures')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    truncate_parser = subparsers.add_parser('truncate', help='empty catalog, carts and orders')
+    truncate_parser.add_argument('--users', action='store_true', help='also remove all users')
+    subparsers.add_parser('snapshot', help='COPY data tables to a directory').add_argument('directory')
+    restore_parser = subparsers.add_parser('restore', help='replace data with a snapshot')
+    restore_parser.add_argument('directory')
+    subparsers.add_parser('save-template', help='clone DB_NAME into a template database').add_argument('template')
+    template_parser = subparsers.add_parser('from-template', help='recreate DB_NAME from a template')
+    template_parser.add_argument('template')
+    for destructive in (truncate_parser, restore_parser, template_parser):
+        destructive.add_argument('--yes', action='store_true', help='skip the confirmation prompt')
+    args = parser.parse_args()
+
+    if args.command == 'truncate':
+        action = 'Delete all catalog, cart and order data' + (' and all users' if args.users else '')
+    elif args.command == 'restore':
+        action = f'Replace all data with the snapshot in {args.directory}'
+    elif args.command == 'from-template':
+        action = f'Drop and recreate the database from {args.template}, disconnecting every session,'
+    else:
+        action = None
+    if action and not confirmed(action, args.yes):
+        sys.exit(1)
+
+    if args.command == 'truncate':
+        ok = truncate(args.users)
+    elif args.command == 'snapshot':
+        ok = snapshot(args.directory)
+    elif args.command == 'restore':
+        ok = restore(args.directory)
+    elif args.command == 'save-template':
+        ok = save_template(args.template)
+    else:
+        ok = from_template(args.template)
+    sys.exit(0 if ok else 1)
@@ -1,6 +1,15 @@
-from flask import Blueprint, jsonify, request
-from config.database import get_db_connection
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from config.database import get_db_connection, stream_query
+from config.logger import get_logger
+from config.auth import check_admin
+from config.cache import invalidate_product, invalidate_catalog
+from services.bulk_products import import_products, iter_export, ImportFormatError, EXPORT_COLUMNS
+from services.search import refresh_search_vector
+from services.uploads import (upload_pipeline, presign_upload, finish_upload,
+                             UploadTooLarge, InvalidUpload, IMAGE_CONTENT_TYPES)
+from services.media import media, variants_column
 import boto3
+import io
 import os
 from werkzeug.utils import secure_filename
 from dotenv import load_dotenv
@@ -8,25 +17,38 @@ from dotenv import load_dotenv
 load_dotenv()
 
 admin_bp = Blueprint('admin', __name__)
+logger = get_logger(__name__)
+
+# Every admin route requires an admin Bearer token
+admin_bp.before_request(check_admin)
 
 # S3 Configuration
 AWS_ACCESS_KEY = os.getenv('AWS_ACCESS_KEY_ID')
 AWS_SECRET_KEY = os.getenv('AWS_SECRET_ACCESS_KEY')
 AWS_REGION = os.getenv('AWS_REGION', 'us-east-1')
 IMAGES_BUCKET = os.getenv('S3_IMAGES_BUCKET', 'ecommerce-images-ankush-2025')
+S3_ENDPOINT_URL = os.getenv('S3_ENDPOINT_URL') or None    # e.g. http://localhost:9000 for MinIO / moto_server
 
 # Initialize S3 client
 s3_client = boto3.client(
     's3',
     aws_access_key_id=AWS_ACCESS_KEY,
     aws_secret_access_key=AWS_SECRET_KEY,
-    region_name=AWS_REGION
+    region_name=AWS_REGION,
+    endpoint_url=S3_ENDPOINT_URL
 )
 
 
 @admin_bp.route('/admin/upload-image', methods=['POST'])
 def upload_image():
-    """Upload product image to S3 images bucket"""
+    """Accept a product image and upload it to S3 in the background
+
+    Responds 202 as soon as the file is spooled to disk. The image_key is
+    final at that point; poll status_url until status is 'done' before
+    relying on the object existing. Without an image_key form field the key
+    is derived from the file's content hash, which lets browsers and the CDN
+    cache it indefinitely.
+    """
     
     if 'image' not in request.files:
         return jsonify({'error': 'No image file provided'}), 400
@@ -34,45 +56,193 @@ def upload_image():
     file = request.files['image']
     image_key = request.form.get('image_key')
     
-    if not image_key:
-        return jsonify({'error': 'Image key required'}), 400
-    
     if not file.filename:
         return jsonify({'error': 'No file selected'}), 400
     
     # Validate file type
-    allowed_extensions = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
     file_ext = file.filename.rsplit('.', 1)[1].lower() if '.' in file.filename else ''
     
-    if file_ext not in allowed_extensions:
+    if file_ext not in IMAGE_CONTENT_TYPES:
         return jsonify({'error': 'Invalid file type. Allowed: PNG, JPG, JPEG, GIF, WEBP'}), 400
     
     try:
-        # Upload to S3 images bucket (WITHOUT ACL)
-        s3_client.upload_fileobj(
-            file,
-            IMAGES_BUCKET,
-            image_key,
-            ExtraArgs={
-                'ContentType': file.content_type
-                # No ACL - bucket policy handles public access
-            }
-        )
-        
-        # Generate public URL
-        image_url = f"https://{IMAGES_BUCKET}.s3.{AWS_REGION}.amazonaws.com/{image_key}"
-        
-        print(f"✅ Image uploaded successfully to {IMAGES_BUCKET}/{image_key}")
+        job = upload_pipeline.submit(s3_client, file.stream, file_ext, image_key)
+    except UploadTooLarge as e:
+        return jsonify({'error': str(e)}), 413
+    except Exception as e:
+        logger.exception("Error queueing image upload")
+        return jsonify({'error': 'Failed to upload image'}), 500
+    
+    return jsonify({
+        'message': 'Image upload queued',
+        'job_id': job['id'],
+        'status': job['status'],
+        'status_url': f"/api/admin/uploads/{job['id']}",
+        'image_key': job['image_key'],
+        'image_url': job['image_url']
+    }), 202
+
+
+@admin_bp.route('/admin/uploads/<job_id>', methods=['GET'])
+def get_upload_job(job_id):
+    """Status of a queued image upload"""
+    
+    try:
+        job = upload_pipeline.get(job_id)
+    except Exception as e:
+        logger.exception("Error reading upload job")
+        return jsonify({'error': 'Failed to read upload status'}), 500
+    
+    if job is None:
+        return jsonify({'error': 'Upload job not found'}), 404
+    
+    return jsonify(job), 200
+
+
+@admin_bp.route('/admin/upload-url', methods=['POST'])
+def create_upload_url():
+    """Issue a presigned S3 upload so the browser sends image bytes straight to S3
+
+    Body: {"filename": "shoe.jpg", "method": "post"|"put"}. After the upload
+    succeeds, call /admin/upload-complete with the returned image_key.
+    """
+    
+    data = request.json or {}
+    filename = data.get('filename', '')
+    method = data.get('method', 'post').lower()
+    file_ext = filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
+    
+    if file_ext not in IMAGE_CONTENT_TYPES:
+        return jsonify({'error': 'Invalid file type. Allowed: PNG, JPG, JPEG, GIF, WEBP'}), 400
+    
+    if method not in ('post', 'put'):
+        return jsonify({'error': 'method must be post or put'}), 400
+    
+    try:
+        upload = presign_upload(s3_client, file_ext, method)
+    except Exception as e:
+        logger.exception("Error presigning image upload")
+        return jsonify({'error': 'Failed to create upload URL'}), 500
+    
+    return jsonify(upload), 200
+
+
+@admin_bp.route('/admin/upload-complete', methods=['POST'])
+def complete_upload():
+    """Validate a direct upload, move it under products/ and optionally attach it
+
+    The object is checked to be a real image and its size variants are
+    rendered before it is promoted. Body: {"image_key": "...", "product_id": 12} with the key returned by
+    /admin/upload-url. The response carries the final image_key; without
+    product_id pass that key to POST /admin/products.
+    """
+    
+    data = request.json or {}
+    image_key = data.get('image_key')
+    product_id = data.get('product_id')
+    
+    if not image_key:
+        return jsonify({'error': 'image_key is required'}), 400
+    
+    try:
+        image_key, head, variants = finish_upload(s3_client, image_key)
+    except InvalidUpload as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.exception("Error verifying image upload")
+        return jsonify({'error': 'Failed to verify upload'}), 500
+    
+    if product_id is not None:
+        conn = get_db_connection()
+        if not conn:
+            return jsonify({'error': 'Database connection failed'}), 500
         
-        return jsonify({
-            'message': 'Image uploaded successfully',
-            'image_key': image_key,
-            'image_url': image_url
-        }), 200
+        cursor = conn.cursor()
         
+        try:
+            cursor.execute("""
+                UPDATE products 
+                SET image_key = %s, updated_at = NOW() 
+                WHERE id = %s
+            """, (image_key, product_id))
+            
+            if cursor.rowcount == 0:
+                conn.rollback()
+                return jsonify({'error': 'Product not found'}), 404
+            
+            conn.commit()
+            invalidate_product(product_id, categories_changed=False)
+            
+        except Exception as e:
+            logger.exception("Error linking image to product")
+            conn.rollback()
+            return jsonify({'error': 'Failed to link image'}), 500
+            
+        finally:
+            cursor.close()
+            conn.close()
+    
+    logger.info("Direct image upload completed", extra={
+        'image_key': image_key, 'bytes': head['ContentLength'], 'product_id': product_id
+    })
+    
+    return jsonify({
+        'message': 'Upload verified',
+        'image_key': image_key,
+        'image_url': media.url(image_key),
+        'variants': variants,
+        'product_id': product_id
+    }), 200
+
+
+@admin_bp.route('/admin/products', methods=['GET'])
+def list_products():
+    """Active products straight from the database, for the stock editor
+
+    The storefront listing is cached and revalidated; stock edits are
+    absolute, so the dashboard must never work from a stale figure.
+    """
+    category = request.args.get('category')
+    search = request.args.get('search')
+
+    conn = get_db_connection()
+    if not conn:
+        return jsonify({'error': 'Database connection failed'}), 500
+
+    cursor = conn.cursor()
+
+    try:
+        query = f"""
+            SELECT id, name, description, price, category, stock, image_key,
+                   is_active, created_at, updated_at, {variants_column()}
+            FROM products WHERE is_active = true
+        """
+        params = []
+
+        if category:
+            query += " AND category = %s"
+            params.append(category)
+
+        if search:
+            query += " AND name ILIKE %s"
+            params.append(f'%{search}%')
+
+        query += " ORDER BY created_at DESC, id DESC"
+        cursor.execute(query, params)
+        products = cursor.fetchall()
+        media.apply(products)
+
+        response = jsonify(products)
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+
     except Exception as e:
-        print(f"❌ Error uploading image to S3: {e}")
-        return jsonify({'error': f'Failed to upload image: {str(e)}'}), 500
+        logger.exception("Error listing products for admin")
+        return jsonify({'error': 'Failed to fetch products'}), 500
+
+    finally:
+        cursor.close()
+        conn.close()
 
 
 @admin_bp.route('/admin/products', methods=['POST'])
@@ -108,9 +278,11 @@ def create_product():
         ))
         
         product_id = cursor.fetchone()['id']
+        refresh_search_vector(cursor, product_id)
         conn.commit()
+        invalidate_product(product_id)
         
-        print(f"✅ Product created with ID: {product_id}")
+        logger.info("Product created", extra={'product_id': product_id})
         
         return jsonify({
             'message': 'Product created successfully',
@@ -118,7 +290,7 @@ def create_product():
         }), 200
         
     except Exception as e:
-        print(f"❌ Error creating product: {e}")
+        logger.exception("Error creating product")
         conn.rollback()
         return jsonify({'error': 'Failed to create product'}), 500
         
@@ -163,17 +335,24 @@ def update_product(product_id):
         if not update_fields:
             return jsonify({'error': 'No fields to update'}), 400
         
+        # Bumps the catalog version behind the storefront ETags
+        update_fields.append('updated_at = NOW()')
         values.append(product_id)
         
         query = f"UPDATE products SET {', '.join(update_fields)} WHERE id = %s"
         cursor.execute(query, values)
         
+        if 'name' in data or 'description' in data:
+            refresh_search_vector(cursor, product_id)
+        
         conn.commit()
+        # Category is not editable here, so the categories list stays valid
+        invalidate_product(product_id, categories_changed=False)
         
         return jsonify({'message': 'Product updated successfully'}), 200
         
     except Exception as e:
-        print(f"❌ Error updating product: {e}")
+        logger.exception("Error updating product")
         conn.rollback()
         return jsonify({'error': 'Failed to update product'}), 500
         
@@ -195,19 +374,103 @@ def delete_product(product_id):
     try:
         cursor.execute("""
             UPDATE products 
-            SET is_active = false 
+            SET is_active = false, updated_at = NOW() 
             WHERE id = %s
         """, (product_id,))
         
         conn.commit()
+        invalidate_product(product_id)
         
         return jsonify({'message': 'Product deleted successfully'}), 200
         
     except Exception as e:
-        print(f"❌ Error deleting product: {e}")
+        logger.exception("Error deleting product")
         conn.rollback()
         return jsonify({'error': 'Failed to delete product'}), 500
         
     finally:
         cursor.close()
-        conn.close()
\ No newline at end of file
+        conn.close()
+
+
+@admin_bp.route('/admin/products/import', methods=['POST'])
+def bulk_import_products():
+    """Bulk create/update products from a CSV or JSONL file
+
+    Send the file as multipart field 'file' or as the raw request body.
+    Format comes from ?format=csv|jsonl, else the file extension or
+    Content-Type. Rows with a sku that already exists update that product.
+    ?dry_run=1 validates and reports without saving.
+    """
+    
+    upload = request.files.get('file')
+    stream = upload.stream if upload else request.stream
+    filename = upload.filename if upload else ''
+    content_type = upload.content_type if upload else request.mimetype
+    
+    file_format = request.args.get('format')
+    if not file_format:
+        if filename.lower().endswith(('.jsonl', '.ndjson')) or content_type in ('application/x-ndjson', 'application/jsonl'):
+            file_format = 'jsonl'
+        else:
+            file_format = 'csv'
+    dry_run = request.args.get('dry_run', '').lower() in ('1', 'true', 'yes')
+    
+    conn = get_db_connection()
+    if not conn:
+        return jsonify({'error': 'Database connection failed'}), 500
+    
+    try:
+        text_stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+        report = import_products(conn, text_stream, file_format, dry_run=dry_run)
+        
+        if not dry_run and (report['inserted'] or report['updated']):
+            invalidate_catalog()
+        
+        logger.info("Products imported", extra={k: v for k, v in report.items() if k != 'errors'})
+        return jsonify(report), 200
+        
+    except ImportFormatError as e:
+        return jsonify({'error': str(e)}), 400
+    except UnicodeDecodeError:
+        return jsonify({'error': 'File must be UTF-8 encoded'}), 400
+    except Exception as e:
+        logger.exception("Error importing products")
+        return jsonify({'error': 'Failed to import products'}), 500
+        
+    finally:
+        conn.close()
+
+
+@admin_bp.route('/admin/products/export', methods=['GET'])
+def bulk_export_products():
+    """Stream every product (active or not) as CSV (default) or JSONL"""
+    
+    file_format = request.args.get('format', 'csv')
+    if file_format not in ('csv', 'jsonl'):
+        return jsonify({'error': 'format must be csv or jsonl'}), 400
+    
+    conn = get_db_connection()
+    if not conn:
+        return jsonify({'error': 'Database connection failed'}), 500
+    
+    try:
+        rows = stream_query(conn, f"SELECT {', '.join(EXPORT_COLUMNS)} FROM products ORDER BY id")
+    except Exception as e:
+        conn.close()
+        logger.exception("Error exporting products")
+        return jsonify({'error': 'Failed to export products'}), 500
+    
+    def generate():
+        try:
+            yield from iter_export(rows, file_format)
+        finally:
+            rows.close()
+            conn.close()
+    
+    mimetype = 'text/csv' if file_format == 'csv' else 'application/x-ndjson'
+    return Response(
+        stream_with_context(generate()),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=products.{file_format}'}
+    )
\ No newline at end of file
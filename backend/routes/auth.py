@@ -1,46 +1,28 @@
 from flask import Blueprint, jsonify, request
 from config.database import get_db_connection
-import bcrypt
-import jwt
-import os
-from datetime import datetime, timedelta
+from config.logger import get_logger
+from config.auth import (create_access_token, create_refresh_token, bearer_token, authenticate,
+                         revoke_token, AuthError, ACCESS_TOKEN_EXPIRE_MINUTES)
+from config.rate_limit import throttle
+from services.passwords import password_hasher, needs_rehash, PasswordPoolBusy
 
 auth_bp = Blueprint('auth', __name__)
-
-# JWT Configuration
-SECRET_KEY = os.getenv('JWT_SECRET_KEY')
-ALGORITHM = 'HS256'
-ACCESS_TOKEN_EXPIRE_HOURS = 24
+logger = get_logger(__name__)
 
 def hash_password(password):
-    """Secure password hashing with bcrypt"""
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    """Secure password hashing with bcrypt (on the hashing process pool)"""
+    return password_hasher.hash(password)
 
 def verify_password(password, hashed):
-    """Verify password against hash"""
-    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
-
-def create_access_token(user_id, email, name, is_admin=False):
-    """Create JWT access token"""
-    expire = datetime.utcnow() + timedelta(hours=ACCESS_TOKEN_EXPIRE_HOURS)
-    payload = {
-        'user_id': user_id,
-        'email': email,
-        'name': name,
-        'is_admin': is_admin,
-        'exp': expire
-    }
-    return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
-
-def verify_token(token):
-    """Verify JWT token"""
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
-    except jwt.ExpiredSignatureError:
-        raise Exception('Token expired')
-    except jwt.InvalidTokenError:
-        raise Exception('Invalid token')
+    """Verify password against hash (on the hashing process pool)"""
+    return password_hasher.verify(password, hashed)
+
+def busy_response():
+    """503 for when every password hashing slot is taken"""
+    response = jsonify({'error': 'Server busy, please retry shortly'})
+    response.status_code = 503
+    response.headers['Retry-After'] = '1'
+    return response
 
 
 @auth_bp.route('/auth/register', methods=['POST'])
@@ -52,6 +34,10 @@ def register():
     email = data.get('email', '').strip()
     password = data.get('password', '')
     
+    throttled = throttle('register', email)
+    if throttled:
+        return throttled
+    
     # Validation
     if not all([name, email, password]):
         return jsonify({'error': 'All fields required'}), 400
@@ -62,6 +48,12 @@ def register():
     if '@' not in email or '.' not in email:
         return jsonify({'error': 'Invalid email format'}), 400
     
+    # Hash before taking a pooled connection so it is not held for the bcrypt time
+    try:
+        hashed_password = hash_password(password)
+    except PasswordPoolBusy:
+        return busy_response()
+    
     conn = get_db_connection()
     if not conn:
         return jsonify({'error': 'Database connection failed'}), 500
@@ -75,7 +67,6 @@ def register():
             return jsonify({'error': 'Email already registered'}), 400
         
         # Create user with bcrypt password
-        hashed_password = hash_password(password)
         cursor.execute("""
             INSERT INTO users (name, email, password, is_admin, created_at)
             VALUES (%s, %s, %s, false, NOW())
@@ -85,10 +76,11 @@ def register():
         user_id = cursor.fetchone()['id']
         conn.commit()
         
-        # Generate JWT token
+        # Generate JWT tokens
         token = create_access_token(user_id, email, name, is_admin=False)
+        refresh_token = create_refresh_token(user_id)
         
-        print(f"✅ User registered: {email} (ID: {user_id})")
+        logger.info("User registered", extra={'user_id': user_id})
         
         return jsonify({
             'message': 'Registration successful',
@@ -98,11 +90,13 @@ def register():
                 'email': email,
                 'is_admin': False
             },
-            'token': token
+            'token': token,
+            'refresh_token': refresh_token,
+            'expires_in': ACCESS_TOKEN_EXPIRE_MINUTES * 60
         }), 200
         
     except Exception as e:
-        print(f"❌ Error registering user: {e}")
+        logger.exception("Error registering user")
         conn.rollback()
         return jsonify({'error': 'Registration failed'}), 500
         
@@ -119,65 +113,202 @@ def login():
     email = data.get('email', '').strip()
     password = data.get('password', '')
     
+    # Every attempt costs a bcrypt verify, so budget them before doing any work
+    throttled = throttle('login', email)
+    if throttled:
+        return throttled
+    
     if not all([email, password]):
         return jsonify({'error': 'Email and password required'}), 400
     
+    user = find_user(email)
+    if user is False:
+        return jsonify({'error': 'Login failed'}), 500
+    
+    if not user:
+        return jsonify({'error': 'Invalid email or password'}), 401
+    
+    # Verify password with bcrypt; no DB connection is held meanwhile
+    try:
+        if not verify_password(password, user['password']):
+            return jsonify({'error': 'Invalid email or password'}), 401
+    except PasswordPoolBusy:
+        return busy_response()
+    
+    if needs_rehash(user['password']):
+        rehash_password(user['id'], password)
+    
+    # Generate JWT tokens
+    token = create_access_token(
+        user['id'],
+        user['email'],
+        user['name'],
+        user['is_admin']
+    )
+    refresh_token = create_refresh_token(user['id'])
+    
+    logger.info("User logged in", extra={'user_id': user['id']})
+    
+    return jsonify({
+        'message': 'Login successful',
+        'user': {
+            'id': user['id'],
+            'name': user['name'],
+            'email': user['email'],
+            'is_admin': user['is_admin']
+        },
+        'token': token,
+        'refresh_token': refresh_token,
+        'expires_in': ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    }), 200
+
+
+def find_user(email):
+    """User row for email, None if there is none, False on a database error"""
+    
     conn = get_db_connection()
     if not conn:
-        return jsonify({'error': 'Database connection failed'}), 500
+        return False
     
     cursor = conn.cursor()
     
     try:
-        # Find user
         cursor.execute("""
             SELECT id, name, email, password, is_admin 
             FROM users 
             WHERE email = %s
         """, (email,))
+        return cursor.fetchone()
         
-        user = cursor.fetchone()
-        
-        if not user:
-            return jsonify({'error': 'Invalid email or password'}), 401
+    except Exception as e:
+        logger.exception("Error logging in")
+        return False
         
-        # Verify password with bcrypt
-        if not verify_password(password, user['password']):
-            return jsonify({'error': 'Invalid email or password'}), 401
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def rehash_password(user_id, password):
+    """Re-hash with the current BCRYPT_ROUNDS after a successful login
+    
+    Best effort: a failure here only delays the upgrade to the next login.
+    """
+    
+    try:
+        hashed_password = hash_password(password)
+    except PasswordPoolBusy:
+        return
+    
+    conn = get_db_connection()
+    if not conn:
+        return
+    
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute("UPDATE users SET password = %s WHERE id = %s", (hashed_password, user_id))
+        conn.commit()
+        logger.info("Password rehashed", extra={'user_id': user_id})
         
-        # Generate JWT token
-        token = create_access_token(
-            user['id'],
-            user['email'],
-            user['name'],
-            user['is_admin']
-        )
+    except Exception as e:
+        logger.exception("Error rehashing password")
+        conn.rollback()
         
-        print(f"✅ User logged in: {email}")
+    finally:
+        cursor.close()
+        conn.close()
+
+
+@auth_bp.route('/auth/refresh', methods=['POST'])
+def refresh():
+    """Swap a refresh token for a new access + refresh token pair
+    
+    Refresh tokens are single use: the presented one is marked spent, and
+    presenting it again is rejected.
+    """
+    
+    data = request.get_json(silent=True) or {}
+    refresh_token = data.get('refresh_token', '')
+    
+    if not refresh_token:
+        return jsonify({'error': 'Refresh token required'}), 400
+    
+    try:
+        payload = authenticate(refresh_token, token_type='refresh')
+    except AuthError as e:
+        return jsonify({'error': str(e)}), e.status
+    
+    conn = get_db_connection()
+    if not conn:
+        return jsonify({'error': 'Database connection failed'}), 500
+    
+    cursor = conn.cursor()
+    
+    try:
+        # Re-read the user so a rename or admin change applies to the new token
+        cursor.execute("""
+            SELECT id, name, email, is_admin 
+            FROM users 
+            WHERE id = %s
+        """, (payload['user_id'],))
         
-        return jsonify({
-            'message': 'Login successful',
-            'user': {
-                'id': user['id'],
-                'name': user['name'],
-                'email': user['email'],
-                'is_admin': user['is_admin']
-            },
-            'token': token
-        }), 200
+        user = cursor.fetchone()
         
     except Exception as e:
-        print(f"❌ Error logging in: {e}")
-        return jsonify({'error': 'Login failed'}), 500
+        logger.exception("Error refreshing token")
+        return jsonify({'error': 'Token refresh failed'}), 500
         
     finally:
         cursor.close()
         conn.close()
+    
+    if not user:
+        return jsonify({'error': 'Invalid token'}), 401
+    
+    try:
+        if not revoke_token(payload):
+            # Already used (another worker saw it first)
+            return jsonify({'error': 'Token revoked'}), 401
+    except Exception as e:
+        logger.exception("Error revoking refresh token")
+        return jsonify({'error': 'Token refresh failed'}), 500
+    
+    token = create_access_token(user['id'], user['email'], user['name'], user['is_admin'])
+    
+    return jsonify({
+        'user': {
+            'id': user['id'],
+            'name': user['name'],
+            'email': user['email'],
+            'is_admin': user['is_admin']
+        },
+        'token': token,
+        'refresh_token': create_refresh_token(user['id']),
+        'expires_in': ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    }), 200
 
 
 @auth_bp.route('/auth/logout', methods=['POST'])
 def logout():
-    """Logout user (frontend will clear token)"""
+    """Logout user: revoke the access token and, if sent, the refresh token"""
+    
+    data = request.get_json(silent=True) or {}
+    presented = [(bearer_token(), 'access'), (data.get('refresh_token'), 'refresh')]
+    
+    try:
+        for token, token_type in presented:
+            if not token:
+                continue
+            try:
+                payload = authenticate(token, token_type=token_type)
+            except AuthError:
+                continue  # expired or already revoked: nothing to do
+            revoke_token(payload)
+    except Exception as e:
+        logger.exception("Error revoking tokens")
+        return jsonify({'error': 'Logout failed'}), 500
+    
     return jsonify({'message': 'Logged out successfully'}), 200
 
 
@@ -185,15 +316,13 @@ def logout():
 def verify():
     """Verify JWT token"""
     
-    auth_header = request.headers.get('Authorization')
+    token = bearer_token()
     
-    if not auth_header:
+    if not token:
         return jsonify({'error': 'No token provided'}), 401
     
     try:
-        # Extract token from "Bearer <token>"
-        token = auth_header.split(' ')[1] if ' ' in auth_header else auth_header
-        payload = verify_token(token)
+        payload = authenticate(token)
         
         return jsonify({
             'valid': True,
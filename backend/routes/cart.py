@@ -1,19 +1,57 @@
 from flask import Blueprint, jsonify, request
 from config.database import get_db_connection
-import os
+from config.logger import get_logger
+from config.auth import require_auth, current_user_id
+from psycopg2.extras import execute_values
+from services.media import media, variants_column
 
 cart_bp = Blueprint('cart', __name__)
+logger = get_logger(__name__)
+
+# Most lines accepted by POST /cart/bulk
+MAX_BULK_ITEMS = 100
+
+# Adds (user_id, product_id, quantity) rows to the cart in one statement.
+# Missing, inactive or under-stocked products produce no row, and an existing
+# line only grows while the new total stays within the product's stock.
+CART_UPSERT_SQL = """
+    INSERT INTO cart (user_id, product_id, quantity, created_at)
+    SELECT v.user_id, p.id, v.quantity, NOW()
+    FROM (VALUES %s) AS v(user_id, product_id, quantity)
+    JOIN products p ON p.id = v.product_id
+    WHERE p.is_active = true AND p.stock >= v.quantity
+    ON CONFLICT (user_id, product_id) DO UPDATE
+    SET quantity = cart.quantity + EXCLUDED.quantity
+    WHERE cart.quantity + EXCLUDED.quantity <= (
+        SELECT stock FROM products WHERE id = EXCLUDED.product_id
+    )
+    RETURNING id, product_id, quantity
+"""
+
+
+def explain_rejection(cursor, user_id, product_id, quantity):
+    """Work out why CART_UPSERT_SQL skipped a line (only runs on the failure path)"""
+    cursor.execute("""
+        SELECT p.stock, p.is_active, c.quantity AS in_cart
+        FROM products p
+        LEFT JOIN cart c ON c.product_id = p.id AND c.user_id = %s
+        WHERE p.id = %s
+    """, (user_id, product_id))
+    product = cursor.fetchone()
+    
+    if not product:
+        return 'Product not found', 404
+    if not product['is_active']:
+        return 'Product is not available', 404
+    if product['stock'] < quantity:
+        return f'Insufficient stock. Only {product["stock"]} available.', 400
+    return f'Cannot add more. Only {product["stock"]} available.', 400
 
 @cart_bp.route('/cart', methods=['GET'])
+@require_auth
 def get_cart():
     """Get user's cart"""
-    user_id = request.args.get('user_id')
-    
-    if not user_id:
-        return jsonify({'error': 'User ID required'}), 400
-    
-    # Convert to string to match database VARCHAR type
-    user_id = str(user_id)
+    user_id = current_user_id()
     
     conn = get_db_connection()
     if not conn:
@@ -22,8 +60,9 @@ def get_cart():
     cursor = conn.cursor()
     
     try:
-        cursor.execute("""
-            SELECT c.id, c.quantity, p.id as product_id, p.name, p.price, p.image_key, p.stock
+        cursor.execute(f"""
+            SELECT c.id, c.quantity, p.id as product_id, p.name, p.price, p.image_key, p.stock,
+                   {variants_column('p')}
             FROM cart c
             JOIN products p ON c.product_id = p.id
             WHERE c.user_id = %s AND p.is_active = true
@@ -35,14 +74,7 @@ def get_cart():
         total = sum(float(item['price']) * item['quantity'] for item in items)
         
         # Add image URLs
-        bucket_name = os.getenv('S3_IMAGES_BUCKET', 'ecommerce-images-ankush-2025')
-        region = os.getenv('AWS_REGION', 'us-east-1')
-        
-        for item in items:
-            if item.get('image_key'):
-                item['imageUrl'] = f"https://{bucket_name}.s3.{region}.amazonaws.com/{item['image_key']}"
-            else:
-                item['imageUrl'] = f"https://via.placeholder.com/100?text={item['name']}"
+        media.apply(items, placeholder_size='100')
         
         return jsonify({
             'items': items,
@@ -51,9 +83,7 @@ def get_cart():
         }), 200
         
     except Exception as e:
-        print(f"❌ Error fetching cart: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error fetching cart")
         return jsonify({'error': str(e)}), 500
         
     finally:
@@ -62,37 +92,24 @@ def get_cart():
 
 
 @cart_bp.route('/cart', methods=['POST'])
+@require_auth
 def add_to_cart():
     """Add item to cart"""
     data = request.json
     
     # Get data from request
-    user_id = data.get('user_id')
+    user_id = current_user_id()
     product_id = data.get('product_id')
     quantity = data.get('quantity', 1)
     
-    print(f"📥 Add to cart request:")
-    print(f"   user_id: {user_id} (type: {type(user_id).__name__})")
-    print(f"   product_id: {product_id} (type: {type(product_id).__name__})")
-    print(f"   quantity: {quantity}")
-    
     # Validate inputs
-    if not user_id:
-        print("❌ Error: User ID missing")
-        return jsonify({'error': 'User ID required. Please login first.'}), 400
-    
     if not product_id:
-        print("❌ Error: Product ID missing")
         return jsonify({'error': 'Product ID required'}), 400
     
-    # Convert user_id to string (database expects VARCHAR)
-    user_id = str(user_id)
-    
     # Convert product_id to integer
     try:
         product_id = int(product_id)
     except (ValueError, TypeError):
-        print(f"❌ Error: Invalid product_id: {product_id}")
         return jsonify({'error': 'Invalid product ID'}), 400
     
     # Convert quantity to integer
@@ -101,83 +118,100 @@ def add_to_cart():
         if quantity < 1:
             raise ValueError("Quantity must be positive")
     except (ValueError, TypeError):
-        print(f"❌ Error: Invalid quantity: {quantity}")
         return jsonify({'error': 'Invalid quantity'}), 400
     
     conn = get_db_connection()
     if not conn:
-        print("❌ Error: Database connection failed")
         return jsonify({'error': 'Database connection failed'}), 500
     
     cursor = conn.cursor()
     
     try:
-        # First, check if product exists and has stock
-        print(f"🔍 Checking product {product_id}...")
-        cursor.execute("""
-            SELECT id, name, stock, is_active FROM products 
-            WHERE id = %s
-        """, (product_id,))
-        
-        product = cursor.fetchone()
+        added = execute_values(cursor, CART_UPSERT_SQL, [(user_id, product_id, quantity)], fetch=True)
         
-        if not product:
-            print(f"❌ Product {product_id} not found")
-            return jsonify({'error': 'Product not found'}), 404
+        if not added:
+            error, status = explain_rejection(cursor, user_id, product_id, quantity)
+            conn.rollback()
+            logger.debug("Add to cart rejected", extra={'product_id': product_id, 'quantity': quantity, 'reason': error})
+            return jsonify({'error': error}), status
         
-        if not product['is_active']:
-            print(f"❌ Product {product_id} is inactive")
-            return jsonify({'error': 'Product is not available'}), 404
+        conn.commit()
+        logger.debug("Cart updated", extra={'cart_id': added[0]['id'], 'product_id': product_id, 'quantity': added[0]['quantity']})
+        return jsonify({
+            'message': 'Added to cart successfully',
+            'item': added[0]
+        }), 200
+
         
-        if product['stock'] < quantity:
-            print(f"❌ Insufficient stock: requested {quantity}, available {product['stock']}")
-            return jsonify({'error': f'Insufficient stock. Only {product["stock"]} available.'}), 400
+    except Exception as e:
+        logger.exception("Error adding to cart")
+        conn.rollback()
+        return jsonify({'error': f'Failed to add to cart: {str(e)}'}), 500
         
-        print(f"✅ Product found: {product['name']}, stock: {product['stock']}")
+    finally:
+        cursor.close()
+        conn.close()
+
+
+@cart_bp.route('/cart/bulk', methods=['POST'])
+@require_auth
+def add_many_to_cart():
+    """Add many products to the cart in one request (re-order, bundles)
+
+    Body: {"items": [{"product_id": 1, "quantity": 2}, ...]}
+    Lines that cannot be added are reported in 'rejected'; the rest are kept.
+    """
+    data = request.json or {}
+    user_id = current_user_id()
+    items = data.get('items')
+    
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'items must be a non-empty list'}), 400
+    
+    if len(items) > MAX_BULK_ITEMS:
+        return jsonify({'error': f'At most {MAX_BULK_ITEMS} items per request'}), 400
+    
+    # Validate and merge duplicate products into one line each
+    quantities = {}
+    try:
+        for item in items:
+            product_id = int(item['product_id'])
+            quantity = int(item.get('quantity', 1))
+            if quantity < 1:
+                raise ValueError("Quantity must be positive")
+            quantities[product_id] = quantities.get(product_id, 0) + quantity
+    except (ValueError, TypeError, KeyError, AttributeError):
+        return jsonify({'error': 'Each item needs a valid product_id and positive quantity'}), 400
+    
+    conn = get_db_connection()
+    if not conn:
+        return jsonify({'error': 'Database connection failed'}), 500
+    
+    cursor = conn.cursor()
+    
+    try:
+        lines = [(user_id, product_id, quantity) for product_id, quantity in sorted(quantities.items())]
+        added = execute_values(cursor, CART_UPSERT_SQL, lines, page_size=len(lines), fetch=True)
         
-        # Check if item already in cart
-        print(f"🔍 Checking if item exists in cart for user {user_id}...")
-        cursor.execute("""
-            SELECT id, quantity FROM cart 
-            WHERE user_id = %s AND product_id = %s
-        """, (user_id, product_id))
-        
-        existing = cursor.fetchone()
-        
-        if existing:
-            print(f"📝 Item exists in cart (id: {existing['id']}), updating quantity...")
-            # Update quantity
-            new_quantity = existing['quantity'] + quantity
-            
-            # Check stock again
-            if new_quantity > product['stock']:
-                print(f"❌ Cannot add more. Total would be {new_quantity}, stock is {product['stock']}")
-                return jsonify({'error': f'Cannot add more. Only {product["stock"]} available.'}), 400
-            
-            cursor.execute("""
-                UPDATE cart SET quantity = %s WHERE id = %s
-            """, (new_quantity, existing['id']))
-            print(f"✅ Updated cart item {existing['id']} to quantity {new_quantity}")
-        else:
-            print(f"📝 Adding new item to cart...")
-            # Insert new item
-            cursor.execute("""
-                INSERT INTO cart (user_id, product_id, quantity, created_at)
-                VALUES (%s, %s, %s, NOW())
-            """, (user_id, product_id, quantity))
-            print(f"✅ Added new cart item: product {product_id}, quantity {quantity}")
+        added_ids = {row['product_id'] for row in added}
+        rejected = []
+        for _, product_id, quantity in lines:
+            if product_id not in added_ids:
+                error, _status = explain_rejection(cursor, user_id, product_id, quantity)
+                rejected.append({'product_id': product_id, 'error': error})
         
         conn.commit()
-        print("✅ Cart updated successfully!")
-        return jsonify({'message': 'Added to cart successfully'}), 200
+        
+        return jsonify({
+            'message': f'Added {len(added)} of {len(lines)} items to cart',
+            'added': added,
+            'rejected': rejected
+        }), 200
         
     except Exception as e:
-        print(f"❌ Error adding to cart: {e}")
-        print(f"❌ Error type: {type(e).__name__}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error adding items to cart")
         conn.rollback()
-        return jsonify({'error': f'Failed to add to cart: {str(e)}'}), 500
+        return jsonify({'error': 'Failed to add items to cart'}), 500
         
     finally:
         cursor.close()
@@ -185,6 +219,7 @@ def add_to_cart():
 
 
 @cart_bp.route('/cart/<int:cart_id>', methods=['PUT'])
+@require_auth
 def update_cart_item(cart_id):
     """Update cart item quantity"""
     data = request.json
@@ -201,14 +236,18 @@ def update_cart_item(cart_id):
     
     try:
         cursor.execute("""
-            UPDATE cart SET quantity = %s WHERE id = %s
-        """, (quantity, cart_id))
+            UPDATE cart SET quantity = %s WHERE id = %s AND user_id = %s
+        """, (quantity, cart_id, current_user_id()))
+        
+        if cursor.rowcount == 0:
+            conn.rollback()
+            return jsonify({'error': 'Cart item not found'}), 404
         
         conn.commit()
         return jsonify({'message': 'Cart updated successfully'}), 200
         
     except Exception as e:
-        print(f"Error updating cart: {e}")
+        logger.exception("Error updating cart")
         conn.rollback()
         return jsonify({'error': 'Failed to update cart'}), 500
         
@@ -218,6 +257,7 @@ def update_cart_item(cart_id):
 
 
 @cart_bp.route('/cart/<int:cart_id>', methods=['DELETE'])
+@require_auth
 def remove_from_cart(cart_id):
     """Remove item from cart"""
     
@@ -228,12 +268,17 @@ def remove_from_cart(cart_id):
     cursor = conn.cursor()
     
     try:
-        cursor.execute("DELETE FROM cart WHERE id = %s", (cart_id,))
+        cursor.execute("DELETE FROM cart WHERE id = %s AND user_id = %s", (cart_id, current_user_id()))
+        
+        if cursor.rowcount == 0:
+            conn.rollback()
+            return jsonify({'error': 'Cart item not found'}), 404
+        
         conn.commit()
         return jsonify({'message': 'Item removed from cart'}), 200
         
     except Exception as e:
-        print(f"Error removing from cart: {e}")
+        logger.exception("Error removing from cart")
         conn.rollback()
         return jsonify({'error': 'Failed to remove item'}), 500
         
@@ -1,41 +1,34 @@
-from flask import Blueprint, jsonify, request
-from config.database import get_db_connection
+from flask import Blueprint, g, jsonify, request
+from config.database import get_db_connection, stream_query
+from config.logger import get_logger
+from config.auth import require_auth, current_user_id
+from config.serialization import stream_json_array
+from psycopg2.extras import execute_values
+from services.inventory import reserve_stock, InsufficientStock
 from datetime import datetime
-import os
+from services.media import media, variants_column
 
 orders_bp = Blueprint('orders', __name__)
+logger = get_logger(__name__)
 
 @orders_bp.route('/orders', methods=['POST'])
+@require_auth
 def create_order():
     """Create new order from cart"""
-    data = request.json
-    
-    # Get user_id
-    user_id = data.get('user_id')
-    
-    if not user_id:
-        print("❌ Error: User ID missing")
-        return jsonify({'error': 'User ID required. Please login first.'}), 400
-    
-    # Convert to string to match cart table
-    user_id = str(user_id)
+    data = request.json or {}
+    user_id = current_user_id()
     
     # Get shipping address (optional)
     shipping_address = data.get('shipping_address', '')
     
-    print(f"\n📦 Creating order for user: {user_id}")
-    print(f"   Shipping address: {shipping_address}")
-    
     conn = get_db_connection()
     if not conn:
-        print("❌ Error: Database connection failed")
         return jsonify({'error': 'Database connection failed'}), 500
     
     cursor = conn.cursor()
     
     try:
         # Get cart items
-        print(f"🔍 Fetching cart items for user {user_id}...")
         cursor.execute("""
             SELECT c.product_id, c.quantity, p.price, p.stock, p.name
             FROM cart c
@@ -46,26 +39,21 @@ def create_order():
         cart_items = cursor.fetchall()
         
         if not cart_items:
-            print("❌ Error: Cart is empty")
             return jsonify({'error': 'Cart is empty'}), 400
         
-        print(f"✅ Found {len(cart_items)} items in cart")
-        
         # Calculate total
         total_amount = sum(float(item['price']) * item['quantity'] for item in cart_items)
-        print(f"💰 Order total: ${total_amount:.2f}")
-        
-        # Check stock availability
-        print("🔍 Checking stock availability...")
-        for item in cart_items:
-            if item['quantity'] > item['stock']:
-                print(f"❌ Insufficient stock for {item['name']}: requested {item['quantity']}, available {item['stock']}")
-                return jsonify({'error': f'Insufficient stock for {item["name"]}. Only {item["stock"]} available.'}), 400
         
-        print("✅ All items have sufficient stock")
+        # Lock the products in id order and take the stock, all or nothing
+        try:
+            reserve_stock(cursor, [(item['product_id'], item['quantity']) for item in cart_items])
+        except InsufficientStock as e:
+            conn.rollback()
+            logger.debug("Checkout rejected: insufficient stock",
+                         extra={'product_id': e.product_id, 'requested': e.requested, 'available': e.available})
+            return jsonify({'error': str(e)}), 400
         
         # Create order
-        print("📝 Creating order record...")
         cursor.execute("""
             INSERT INTO orders (user_id, total_amount, shipping_address, status, created_at)
             VALUES (%s, %s, %s, 'pending', NOW())
@@ -74,30 +62,19 @@ def create_order():
         
         order_result = cursor.fetchone()
         order_id = order_result['id']
-        print(f"✅ Order created with ID: {order_id}")
-        
-        # Create order items and update stock
-        print("📝 Creating order items...")
-        for item in cart_items:
-            # Insert order item
-            cursor.execute("""
-                INSERT INTO order_items (order_id, product_id, quantity, price, created_at)
-                VALUES (%s, %s, %s, %s, NOW())
-            """, (order_id, item['product_id'], item['quantity'], item['price']))
-            
-            # Update product stock
-            cursor.execute("""
-                UPDATE products SET stock = stock - %s WHERE id = %s
-            """, (item['quantity'], item['product_id']))
-            
-            print(f"   ✅ Added {item['name']} (qty: {item['quantity']}) to order")
+        
+        # Create all order items in one multi-row insert
+        execute_values(cursor, """
+            INSERT INTO order_items (order_id, product_id, quantity, price, created_at)
+            VALUES %s
+        """, [(order_id, item['product_id'], item['quantity'], item['price']) for item in cart_items],
+            template="(%s, %s, %s, %s, NOW())", page_size=len(cart_items))
         
         # Clear cart
-        print("🗑️  Clearing cart...")
         cursor.execute("DELETE FROM cart WHERE user_id = %s", (user_id,))
         
         conn.commit()
-        print(f"✅ Order {order_id} completed successfully!")
+        logger.info("Order placed", extra={'order_id': order_id, 'lines': len(cart_items), 'total': total_amount})
         
         return jsonify({
             'message': 'Order placed successfully',
@@ -106,10 +83,7 @@ def create_order():
         }), 200
         
     except Exception as e:
-        print(f"❌ Error creating order: {e}")
-        print(f"❌ Error type: {type(e).__name__}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error creating order")
         conn.rollback()
         return jsonify({'error': f'Failed to create order: {str(e)}'}), 500
         
@@ -119,45 +93,41 @@ def create_order():
 
 
 @orders_bp.route('/orders', methods=['GET'])
+@require_auth
 def get_orders():
     """Get user's orders"""
-    user_id = request.args.get('user_id')
-    
-    if not user_id:
-        return jsonify({'error': 'User ID required'}), 400
-    
-    # Convert to string
-    user_id = str(user_id)
+    user_id = current_user_id()
     
     conn = get_db_connection()
     if not conn:
         return jsonify({'error': 'Database connection failed'}), 500
     
-    cursor = conn.cursor()
+    streaming = False
     
     try:
-        cursor.execute("""
+        # Server-side cursor: rows are fetched in batches as the response is written
+        rows = stream_query(conn, """
             SELECT * FROM orders 
             WHERE user_id = %s 
             ORDER BY created_at DESC
         """, (user_id,))
+        streaming = True
         
-        orders = cursor.fetchall()
-        
-        return jsonify(orders), 200
+        return stream_json_array(rows, cleanup=conn.close)
         
     except Exception as e:
-        print(f"Error fetching orders: {e}")
+        logger.exception("Error fetching orders")
         return jsonify({'error': 'Failed to fetch orders'}), 500
         
     finally:
-        cursor.close()
-        conn.close()
+        if not streaming:
+            conn.close()
 
 
 @orders_bp.route('/orders/<int:order_id>', methods=['GET'])
+@require_auth
 def get_order(order_id):
-    """Get order details with items"""
+    """Get order details with items (admins may read any order)"""
     
     conn = get_db_connection()
     if not conn:
@@ -170,12 +140,13 @@ def get_order(order_id):
         cursor.execute("SELECT * FROM orders WHERE id = %s", (order_id,))
         order = cursor.fetchone()
         
-        if not order:
+        # Someone else's order is reported as missing, not forbidden
+        if not order or (order['user_id'] != current_user_id() and not g.user['is_admin']):
             return jsonify({'error': 'Order not found'}), 404
         
         # Get order items
-        cursor.execute("""
-            SELECT oi.*, p.name, p.image_key
+        cursor.execute(f"""
+            SELECT oi.*, p.name, p.image_key, {variants_column('p')}
             FROM order_items oi
             JOIN products p ON oi.product_id = p.id
             WHERE oi.order_id = %s
@@ -184,21 +155,14 @@ def get_order(order_id):
         items = cursor.fetchall()
         
         # Add image URLs
-        bucket_name = os.getenv('S3_IMAGES_BUCKET', 'ecommerce-images-ankush-2025')
-        region = os.getenv('AWS_REGION', 'us-east-1')
-        
-        for item in items:
-            if item.get('image_key'):
-                item['imageUrl'] = f"https://{bucket_name}.s3.{region}.amazonaws.com/{item['image_key']}"
-            else:
-                item['imageUrl'] = f"https://via.placeholder.com/100?text={item['name']}"
+        media.apply(items, placeholder_size='100')
         
         order['items'] = items
         
         return jsonify(order), 200
         
     except Exception as e:
-        print(f"Error fetching order: {e}")
+        logger.exception("Error fetching order")
         return jsonify({'error': 'Failed to fetch order'}), 500
         
     finally:
@@ -1,38 +1,171 @@
-from flask import Blueprint, jsonify, request
-from config.database import get_db_connection
-import os
+from flask import Blueprint, Response, jsonify, request
+from config.database import get_db_connection, stream_query
+from config.logger import get_logger
+from config.serialization import stream_json_array, STREAM_BATCH_SIZE
+from config.http_cache import catalog_version, not_modified, not_modified_response, apply_cache_headers
+from config.cache import catalog_cache, product_list_key, product_key, CATEGORIES_KEY, CATALOG_CACHE_MAX_BODY_BYTES
+from services.search import build_prefix_tsquery, trigram_available, set_trigram_threshold
+from services.media import media, variants_column
+import json
+import base64
+from itertools import islice
+from datetime import datetime
 
 products_bp = Blueprint('products', __name__)
+logger = get_logger(__name__)
+
+# Pagination / projection settings
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+PRODUCT_FIELDS = ('id', 'name', 'description', 'price', 'category', 'stock',
+                  'image_key', 'is_active', 'created_at', 'updated_at', 'imageUrl', 'imageVariants')
+# Fields computed in Python rather than read from the table
+COMPUTED_FIELDS = {'imageUrl', 'imageVariants'}
+# Columns always read so cursors and image URLs can be built
+REQUIRED_COLUMNS = ('id', 'name', 'image_key', 'created_at')
+# Everything a client may see (search_vector stays internal)
+PRODUCT_COLUMNS = ', '.join(field for field in PRODUCT_FIELDS if field not in COMPUTED_FIELDS)
+
+
+def encode_cursor(product):
+    """Opaque next-page token for the (created_at, id) keyset"""
+    raw = json.dumps([product['created_at'].isoformat(), product['id']])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(token):
+    """Decode a next-page token back to (created_at, id)"""
+    created_at, product_id = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+    return datetime.fromisoformat(created_at), int(product_id)
+
+
+def parse_fields(fields_param):
+    """Validate a comma-separated fields= projection, or return None for all fields"""
+    if not fields_param:
+        return None
+    fields = tuple(sorted({f.strip() for f in fields_param.split(',') if f.strip()}))
+    unknown = [f for f in fields if f not in PRODUCT_FIELDS]
+    if unknown or not fields:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+
+def project(product, fields):
+    """Keep only the requested fields of a product row"""
+    return {field: product[field] for field in fields if field in product}
+
+
+def iter_product_rows(rows, fields=None):
+    """Yield listing rows batch by batch with image URLs and projection applied"""
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, STREAM_BATCH_SIZE))
+        if not batch:
+            break
+        media.apply(batch)
+        for product in batch:
+            yield project(product, fields) if fields else product
+
 
 @products_bp.route('/products', methods=['GET'])
 def get_products():
-    """Get all products with optional filters"""
+    """Get products with optional filters, keyset pagination and field projection
+
+    Without limit/cursor the full list is returned (legacy behaviour). With
+    either one the response is {'items': [...], 'next_cursor': token|null}.
+    search= uses the full-text index and returns results ranked by relevance,
+    so it supports limit (the top matches, next_cursor always null) but not
+    cursor.
+    """
+    
+    # Get query parameters
+    category = request.args.get('category')
+    search = request.args.get('search')
+    min_price = request.args.get('minPrice')
+    max_price = request.args.get('maxPrice')
+    limit = request.args.get('limit')
+    cursor_token = request.args.get('cursor')
+    paginated = bool(limit or cursor_token)
+    
+    try:
+        fields = parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if search and cursor_token:
+        return jsonify({'error': 'cursor cannot be combined with search'}), 400
+    
+    if paginated:
+        try:
+            limit = min(max(int(limit or DEFAULT_PAGE_SIZE), 1), MAX_PAGE_SIZE)
+            after = decode_cursor(cursor_token) if cursor_token else None
+        except (ValueError, TypeError):
+            return jsonify({'error': 'Invalid limit or cursor'}), 400
+    else:
+        limit, after = None, None
+    
+    try:
+        cache_key = product_list_key(category, search, min_price, max_price,
+                                     limit=limit, cursor=cursor_token, fields=fields)
+    except ValueError:
+        return jsonify({'error': 'Invalid price filter'}), 400
+    
+    # Conditional GET: answer 304 before touching the listing query
+    version = catalog_version()
+    if not_modified(version):
+        return not_modified_response(version)
+    
+    cached = catalog_cache.get(cache_key)
+    if isinstance(cached, bytes):
+        # Full listings are cached already serialized
+        return apply_cache_headers(Response(cached, mimetype='application/json'), version)
+    if cached is not None:
+        return apply_cache_headers(jsonify(cached), version)
     
     conn = get_db_connection()
     if not conn:
         return jsonify({'error': 'Database connection failed'}), 500
     
     cursor = conn.cursor()
+    streaming = False
     
     try:
-        # Get query parameters
-        category = request.args.get('category')
-        search = request.args.get('search')
-        min_price = request.args.get('minPrice')
-        max_price = request.args.get('maxPrice')
-        
         # Build query
-        query = "SELECT * FROM products WHERE is_active = true"
+        if fields:
+            columns = sorted((set(fields) - COMPUTED_FIELDS) | set(REQUIRED_COLUMNS))
+            select = ', '.join(columns)
+        else:
+            select = PRODUCT_COLUMNS
+        if not fields or 'imageVariants' in fields:
+            select += ', ' + variants_column()
+        query = f"SELECT {select} FROM products WHERE is_active = true"
         params = []
+        order_by = "created_at DESC, id DESC"
+        order_params = []
         
         if category:
             query += " AND category = %s"
             params.append(category)
         
         if search:
-            query += " AND (name ILIKE %s OR description ILIKE %s)"
-            params.append(f'%{search}%')
-            params.append(f'%{search}%')
+            tsquery = build_prefix_tsquery(search)
+            if tsquery is None:
+                # Nothing indexable (e.g. only punctuation), match the raw text
+                query += " AND name ILIKE %s"
+                params.append(f'%{search}%')
+            elif trigram_available(cursor):
+                # Full-text prefix match, falling back to trigram similarity for typos
+                set_trigram_threshold(cursor)
+                query += " AND (search_vector @@ to_tsquery('english', %s) OR %s <%% name)"
+                params.extend([tsquery, search])
+                order_by = ("ts_rank(search_vector, to_tsquery('english', %s)) DESC, "
+                            "word_similarity(%s, name) DESC, " + order_by)
+                order_params = [tsquery, search]
+            else:
+                query += " AND search_vector @@ to_tsquery('english', %s)"
+                params.append(tsquery)
+                order_by = "ts_rank(search_vector, to_tsquery('english', %s)) DESC, " + order_by
+                order_params = [tsquery]
         
         if min_price:
             query += " AND price >= %s"
@@ -42,36 +175,78 @@ def get_products():
             query += " AND price <= %s"
             params.append(float(max_price))
         
-        query += " ORDER BY created_at DESC"
+        if after:
+            query += " AND (created_at, id) < (%s, %s)"
+            params.extend(after)
+        
+        query += f" ORDER BY {order_by}"
+        params.extend(order_params)
+        
+        if limit:
+            # Fetch one extra row to know whether another page exists
+            query += " LIMIT %s"
+            params.append(limit + 1)
+        
+        if not paginated:
+            # Full listing: read through a server-side cursor and send rows in
+            # batches, so neither side holds the whole catalog in memory
+            rows = stream_query(conn, query, params)
+            streaming = True
+            
+            def cleanup():
+                cursor.close()
+                conn.close()
+            
+            return apply_cache_headers(stream_json_array(
+                iter_product_rows(rows, fields),
+                cleanup=cleanup,
+                on_complete=lambda body: catalog_cache.set(cache_key, body),
+                max_collect_bytes=CATALOG_CACHE_MAX_BODY_BYTES
+            ), version)
         
         cursor.execute(query, params)
         products = cursor.fetchall()
         
+        next_cursor = None
+        if limit and len(products) > limit:
+            products = products[:limit]
+            # Ranked search results are not in keyset order, so they have no next page
+            if not search:
+                next_cursor = encode_cursor(products[-1])
+        
         # Add image URLs
-        bucket_name = os.getenv('S3_IMAGES_BUCKET', 'ecommerce-images-ankush-2025')
-        region = os.getenv('AWS_REGION', 'us-east-1')
+        media.apply(products)
         
-        for product in products:
-            if product.get('image_key'):
-                product['imageUrl'] = f"https://{bucket_name}.s3.{region}.amazonaws.com/{product['image_key']}"
-            else:
-                product['imageUrl'] = f"https://via.placeholder.com/300x200?text={product['name']}"
+        if fields:
+            products = [project(product, fields) for product in products]
+        
+        result = {'items': products, 'next_cursor': next_cursor}
+        catalog_cache.set(cache_key, result)
         
-        return jsonify(products), 200
+        return apply_cache_headers(jsonify(result), version)
         
     except Exception as e:
-        print(f"Error fetching products: {e}")
+        logger.exception("Error fetching products")
         return jsonify({'error': 'Failed to fetch products'}), 500
         
     finally:
-        cursor.close()
-        conn.close()
+        if not streaming:
+            cursor.close()
+            conn.close()
 
 
 @products_bp.route('/products/<int:product_id>', methods=['GET'])
 def get_product(product_id):
     """Get single product by ID"""
     
+    version = catalog_version()
+    if not_modified(version):
+        return not_modified_response(version)
+    
+    cached = catalog_cache.get(product_key(product_id))
+    if cached is not None:
+        return apply_cache_headers(jsonify(cached), version)
+    
     conn = get_db_connection()
     if not conn:
         return jsonify({'error': 'Database connection failed'}), 500
@@ -79,25 +254,22 @@ def get_product(product_id):
     cursor = conn.cursor()
     
     try:
-        cursor.execute("SELECT * FROM products WHERE id = %s AND is_active = true", (product_id,))
+        cursor.execute(f"SELECT {PRODUCT_COLUMNS}, {variants_column()} FROM products "
+                       "WHERE id = %s AND is_active = true", (product_id,))
         product = cursor.fetchone()
         
         if not product:
             return jsonify({'error': 'Product not found'}), 404
         
         # Add image URL
-        bucket_name = os.getenv('S3_IMAGES_BUCKET', 'ecommerce-images-ankush-2025')
-        region = os.getenv('AWS_REGION', 'us-east-1')
+        media.apply([product])
         
-        if product.get('image_key'):
-            product['imageUrl'] = f"https://{bucket_name}.s3.{region}.amazonaws.com/{product['image_key']}"
-        else:
-            product['imageUrl'] = f"https://via.placeholder.com/300x200?text={product['name']}"
+        catalog_cache.set(product_key(product_id), product)
         
-        return jsonify(product), 200
+        return apply_cache_headers(jsonify(product), version)
         
     except Exception as e:
-        print(f"Error fetching product: {e}")
+        logger.exception("Error fetching product")
         return jsonify({'error': 'Failed to fetch product'}), 500
         
     finally:
@@ -108,6 +280,14 @@ def get_product(product_id):
 def get_categories():
     """Get all unique product categories"""
     
+    version = catalog_version()
+    if not_modified(version):
+        return not_modified_response(version)
+    
+    cached = catalog_cache.get(CATEGORIES_KEY)
+    if cached is not None:
+        return apply_cache_headers(jsonify(cached), version)
+    
     conn = get_db_connection()
     if not conn:
         return jsonify({'error': 'Database connection failed'}), 500
@@ -123,11 +303,12 @@ def get_categories():
         """)
         
         categories = [row['category'] for row in cursor.fetchall()]
+        catalog_cache.set(CATEGORIES_KEY, categories)
         
-        return jsonify(categories), 200
+        return apply_cache_headers(jsonify(categories), version)
         
     except Exception as e:
-        print(f"Error fetching categories: {e}")
+        logger.exception("Error fetching categories")
         return jsonify({'error': 'Failed to fetch categories'}), 500
         
     finally:
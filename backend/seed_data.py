@@ -1,4 +1,5 @@
 from config.database import get_db_connection
+from services.search import SEARCH_VECTOR_SQL
 
 def seed_products():
     """Add sample products to database"""
@@ -29,6 +30,9 @@ def seed_products():
                 VALUES (%s, %s, %s, %s, %s, %s)
             """, product)
         
+        # Index the new rows for full-text search
+        cursor.execute(f"UPDATE products SET search_vector = {SEARCH_VECTOR_SQL} WHERE search_vector IS NULL")
+        
         conn.commit()
         print(f"✅ Added {len(products)} sample products to database!")
         return True
@@ -0,0 +1,241 @@
+import csv
+import io
+import json
+import os
+from decimal import Decimal, InvalidOperation
+from dotenv import load_dotenv
+from config.serialization import dumps_bytes
+from services.search import SEARCH_VECTOR_SQL
+
+load_dotenv()
+
+# Bulk import/export configuration
+IMPORT_MAX_BYTES = int(os.getenv('IMPORT_MAX_BYTES', 100 * 1024 * 1024))
+IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', 5000))     # rows per COPY into the staging table
+IMPORT_MAX_REPORTED_ERRORS = 1000
+
+# Columns accepted on import, in staging/COPY order
+IMPORT_COLUMNS = ('sku', 'name', 'description', 'price', 'category', 'stock', 'image_key', 'is_active')
+REQUIRED_IMPORT_COLUMNS = ('name', 'price', 'category')
+EXPORT_COLUMNS = ('id', 'sku', 'name', 'description', 'price', 'category', 'stock',
+                  'image_key', 'is_active', 'created_at', 'updated_at')
+
+TRUE_VALUES = {'true', 't', '1', 'yes', 'y'}
+FALSE_VALUES = {'false', 'f', '0', 'no', 'n'}
+
+
+class ImportFormatError(Exception):
+    """The file as a whole cannot be read (bad format or missing columns)"""
+
+
+def read_records(text_stream, file_format):
+    """Yield (line_number, dict) from a CSV (with header) or JSONL text stream
+
+    Unparseable JSONL lines are yielded as (line_number, ValueError).
+    """
+    if file_format == 'csv':
+        reader = csv.DictReader(text_stream)
+        missing = [column for column in REQUIRED_IMPORT_COLUMNS if column not in (reader.fieldnames or ())]
+        if missing:
+            raise ImportFormatError(f"CSV header is missing: {', '.join(missing)}")
+        for record in reader:
+            yield reader.line_num, record
+    elif file_format == 'jsonl':
+        for line_number, line in enumerate(text_stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError('line is not a JSON object')
+            except ValueError as e:
+                yield line_number, ValueError(f'Invalid JSON: {e}')
+                continue
+            yield line_number, record
+    else:
+        raise ImportFormatError(f'Unsupported format: {file_format}')
+
+
+def _text(record, field, max_length=None, required=False):
+    value = record.get(field)
+    value = str(value).strip() if value is not None else ''
+    if not value:
+        if required:
+            raise ValueError(f'{field} is required')
+        return None
+    if max_length and len(value) > max_length:
+        raise ValueError(f'{field} is longer than {max_length} characters')
+    return value
+
+
+def validate_record(record):
+    """Normalize one import record into a tuple in IMPORT_COLUMNS order
+
+    Raises ValueError describing the first problem found.
+    """
+    sku = _text(record, 'sku', 64)
+    name = _text(record, 'name', 255, required=True)
+    description = _text(record, 'description')
+    category = _text(record, 'category', 100, required=True)
+    image_key = _text(record, 'image_key', 512)
+
+    try:
+        price = Decimal(str(record.get('price')).strip())
+    except (InvalidOperation, TypeError):
+        raise ValueError('price must be a number')
+    if not price.is_finite() or price < 0 or price >= Decimal('100000000'):
+        raise ValueError('price must be between 0 and 99999999.99')
+    price = price.quantize(Decimal('0.01'))
+
+    stock = record.get('stock')
+    if stock in (None, ''):
+        stock = 0
+    try:
+        stock = int(str(stock).strip())
+    except ValueError:
+        raise ValueError('stock must be an integer')
+    if not 0 <= stock <= 2147483647:
+        raise ValueError('stock must be zero or positive')
+
+    is_active = record.get('is_active')
+    if is_active in (None, ''):
+        is_active = True
+    elif not isinstance(is_active, bool):
+        flag = str(is_active).strip().lower()
+        if flag not in TRUE_VALUES | FALSE_VALUES:
+            raise ValueError('is_active must be true or false')
+        is_active = flag in TRUE_VALUES
+
+    return (sku, name, description, price, category, stock, image_key, is_active)
+
+
+def _copy_batch(cursor, batch):
+    """COPY validated rows into the staging table"""
+    buffer = io.StringIO()
+    # Quote everything so no value can read as COPY's end-of-data marker;
+    # validation never yields empty strings, so FORCE_NULL maps '' back to NULL
+    writer = csv.writer(buffer, quoting=csv.QUOTE_ALL)
+    for row in batch:
+        writer.writerow(['' if value is None else value for value in row])
+    buffer.seek(0)
+    cursor.copy_expert(
+        f"COPY import_staging ({', '.join(IMPORT_COLUMNS)}) FROM STDIN "
+        f"WITH (FORMAT csv, FORCE_NULL (sku, description, image_key))",
+        buffer
+    )
+
+
+def import_products(conn, text_stream, file_format, dry_run=False, batch_size=IMPORT_BATCH_SIZE):
+    """Validate and load products from a CSV/JSONL stream in one transaction
+
+    Valid rows are streamed into a temporary staging table with COPY, batch
+    by batch, then merged into products with a single INSERT .. ON CONFLICT:
+    rows with a known sku update that product, the rest are inserted. Invalid
+    rows are skipped and reported by line. Commits unless dry_run; the caller
+    owns the connection. Returns a report dict.
+    """
+    cursor = conn.cursor()
+    errors = []
+    rejected = 0
+    seen_skus = {}
+
+    def reject(line_number, message):
+        nonlocal rejected
+        rejected += 1
+        if len(errors) < IMPORT_MAX_REPORTED_ERRORS:
+            errors.append({'line': line_number, 'error': message})
+
+    try:
+        cursor.execute("""
+            CREATE TEMP TABLE import_staging (
+                sku VARCHAR(64),
+                name VARCHAR(255) NOT NULL,
+                description TEXT,
+                price DECIMAL(10, 2) NOT NULL,
+                category VARCHAR(100),
+                stock INTEGER NOT NULL,
+                image_key VARCHAR(512),
+                is_active BOOLEAN NOT NULL
+            ) ON COMMIT DROP
+        """)
+
+        batch = []
+        for line_number, record in read_records(text_stream, file_format):
+            if isinstance(record, Exception):
+                reject(line_number, str(record))
+                continue
+            try:
+                row = validate_record(record)
+            except ValueError as e:
+                reject(line_number, str(e))
+                continue
+
+            sku = row[0]
+            if sku is not None:
+                if sku in seen_skus:
+                    reject(line_number, f'duplicate sku {sku} (first seen on line {seen_skus[sku]})')
+                    continue
+                seen_skus[sku] = line_number
+
+            batch.append(row)
+            if len(batch) >= batch_size:
+                _copy_batch(cursor, batch)
+                batch = []
+        if batch:
+            _copy_batch(cursor, batch)
+
+        columns = ', '.join(IMPORT_COLUMNS)
+        updates = ', '.join(f'{column} = EXCLUDED.{column}' for column in IMPORT_COLUMNS if column != 'sku')
+        cursor.execute(f"""
+            WITH upserted AS (
+                INSERT INTO products ({columns}, search_vector)
+                SELECT {columns}, {SEARCH_VECTOR_SQL} FROM import_staging
+                ON CONFLICT (sku) DO UPDATE
+                SET {updates}, search_vector = EXCLUDED.search_vector, updated_at = NOW()
+                RETURNING (xmax = 0) AS inserted
+            )
+            SELECT count(*) FILTER (WHERE inserted) AS inserted,
+                   count(*) FILTER (WHERE NOT inserted) AS updated
+            FROM upserted
+        """)
+        result = cursor.fetchone()
+
+        if dry_run:
+            conn.rollback()
+        else:
+            conn.commit()
+
+        return {
+            'inserted': result['inserted'],
+            'updated': result['updated'],
+            'rejected': rejected,
+            'errors': errors,
+            'errors_truncated': rejected > len(errors),
+            'dry_run': dry_run
+        }
+
+    except Exception:
+        conn.rollback()
+        raise
+
+    finally:
+        cursor.close()
+
+
+def iter_export(rows, file_format):
+    """Yield CSV (with header) or JSONL byte chunks for product rows"""
+    if file_format == 'jsonl':
+        for row in rows:
+            yield dumps_bytes(row) + b'\n'
+        return
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for count, row in enumerate(rows, start=1):
+        writer.writerow([row[column] for column in EXPORT_COLUMNS])
+        if count % 1000 == 0:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
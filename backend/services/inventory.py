@@ -0,0 +1,61 @@
+from psycopg2.extras import execute_values
+
+
+class InsufficientStock(Exception):
+    """Raised when a product cannot cover the requested quantity"""
+
+    def __init__(self, product_id, name, requested, available):
+        super().__init__(f'Insufficient stock for {name}. Only {available} available.')
+        self.product_id = product_id
+        self.name = name
+        self.requested = requested
+        self.available = available
+
+
+def merge_lines(lines):
+    """Sum quantities per product and sort by product_id"""
+    totals = {}
+    for product_id, quantity in lines:
+        totals[product_id] = totals.get(product_id, 0) + quantity
+    return sorted(totals.items())
+
+
+def reserve_stock(cursor, lines):
+    """Atomically take stock for every (product_id, quantity) line, or none of it
+
+    Must run inside the caller's transaction; commit/rollback is up to the
+    caller. Rows are locked with FOR UPDATE in product_id order, so two
+    checkouts that share products always take their locks in the same order
+    and cannot deadlock. The availability check happens under that lock, so
+    concurrent checkouts can never push stock below zero.
+    Raises InsufficientStock for the first product that cannot be covered.
+    Instead of touching updated_at on every row it bumps the
+    products_stock_version sequence, which moves the catalog ETag so
+    storefronts and the admin dashboard see the new stock.
+    """
+    lines = merge_lines(lines)
+    if not lines:
+        return
+
+    cursor.execute("""
+        SELECT id, name, stock FROM products
+        WHERE id = ANY(%s) AND is_active = true
+        ORDER BY id
+        FOR UPDATE
+    """, ([product_id for product_id, _ in lines],))
+    locked = {row['id']: row for row in cursor.fetchall()}
+
+    for product_id, quantity in lines:
+        product = locked.get(product_id)
+        if product is None:
+            raise InsufficientStock(product_id, f'product {product_id}', quantity, 0)
+        if product['stock'] < quantity:
+            raise InsufficientStock(product_id, product['name'], quantity, product['stock'])
+
+    execute_values(cursor, """
+        UPDATE products p
+        SET stock = p.stock - v.quantity
+        FROM (VALUES %s) AS v(product_id, quantity)
+        WHERE p.id = v.product_id
+    """, lines, page_size=len(lines))
+    cursor.execute("SELECT nextval('products_stock_version')")
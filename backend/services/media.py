@@ -0,0 +1,96 @@
+import hashlib
+import os
+import posixpath
+from urllib.parse import quote
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Media configuration (read once at import time)
+IMAGES_BUCKET = os.getenv('S3_IMAGES_BUCKET', 'ecommerce-images-ankush-2025')
+AWS_REGION = os.getenv('AWS_REGION', 'us-east-1')
+MEDIA_CDN_BASE_URL = os.getenv('MEDIA_CDN_BASE_URL', '')        # e.g. https://d1234.cloudfront.net
+IMAGE_VARIANTS = os.getenv('IMAGE_VARIANTS', '')                # e.g. "thumb:150,medium:600"
+PLACEHOLDER_BASE_URL = 'https://via.placeholder.com'
+
+# Cache lifetime for content-hashed keys: the bytes behind a key never change
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+def parse_variants(spec):
+    """Parse "name:width,..." into {name: width}"""
+    variants = {}
+    for part in filter(None, (p.strip() for p in spec.split(','))):
+        name, width = part.split(':')
+        variants[name.strip()] = int(width)
+    return variants
+
+
+def content_hashed_key(data, extension, prefix='products'):
+    """Object key derived from the file contents, e.g. products/3f2a9c0d1e4b5a67.jpg"""
+    return digest_key(hashlib.sha256(data).hexdigest(), extension, prefix)
+
+
+def digest_key(hexdigest, extension, prefix='products'):
+    """content_hashed_key() for a sha256 hex digest computed elsewhere (e.g. while streaming)"""
+    return f"{prefix}/{hexdigest[:16]}.{extension.lower()}"
+
+
+def variant_key(image_key, variant):
+    """Key of a resized WebP variant: products/abc.jpg -> products/thumb/abc.webp"""
+    directory, filename = posixpath.split(image_key)
+    stem = posixpath.splitext(filename)[0]
+    return posixpath.join(directory, variant, f"{stem}.webp")
+
+
+def variants_column(table='products'):
+    """Select expression reading the registered variants of table.image_key as image_variants"""
+    return (f"(SELECT variants FROM image_variants iv WHERE iv.image_key = {table}.image_key) "
+            f"AS image_variants")
+
+
+class MediaUrlResolver:
+    """Builds public image URLs from image_key values
+
+    Serves from the CDN when MEDIA_CDN_BASE_URL is set, otherwise straight from
+    the S3 bucket. When size variants are configured, rows selected with
+    variants_column() also get an imageVariants map (name -> URL) for srcset,
+    limited to the variants actually stored for that image.
+    """
+
+    def __init__(self, base_url, variants=None):
+        self.base_url = base_url.rstrip('/')
+        self.variants = variants or {}
+
+    @classmethod
+    def from_env(cls):
+        base_url = MEDIA_CDN_BASE_URL or f"https://{IMAGES_BUCKET}.s3.{AWS_REGION}.amazonaws.com"
+        return cls(base_url, parse_variants(IMAGE_VARIANTS))
+
+    def url(self, image_key):
+        """Public URL for an object key"""
+        return f"{self.base_url}/{image_key}"
+
+    def placeholder(self, text, size):
+        """Placeholder image URL used when a row has no image"""
+        return f"{PLACEHOLDER_BASE_URL}/{size}?text={quote(str(text))}"
+
+    def apply(self, rows, placeholder_size='300x200'):
+        """Set imageUrl (and imageVariants) on every row in one pass; returns rows"""
+        base = self.base_url
+        variants = self.variants
+        for row in rows:
+            key = row.get('image_key')
+            stored = row.pop('image_variants', None)
+            if key:
+                row['imageUrl'] = f"{base}/{key}"
+                if variants and stored:
+                    row['imageVariants'] = {name: f"{base}/{variant_key(key, name)}"
+                                            for name in variants if name in stored}
+            else:
+                row['imageUrl'] = self.placeholder(row.get('name', ''), placeholder_size)
+        return rows
+
+
+# Shared resolver built once at startup
+media = MediaUrlResolver.from_env()
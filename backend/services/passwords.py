@@ -0,0 +1,148 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+import bcrypt
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# bcrypt cost factor for new hashes; existing hashes are upgraded on login
+BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', 12))
+# Hashing runs in its own processes so a login spike cannot starve request threads.
+# Every gunicorn worker gets its own pool, and the default 2*CPU+1 workers already
+# outnumber the cores, so one process each is the default; raise it only with
+# fewer gunicorn workers than cores
+PASSWORD_WORKERS = int(os.getenv('PASSWORD_WORKERS', 1))
+# Hashes allowed to wait or run at once; beyond this callers get PasswordPoolBusy
+PASSWORD_MAX_PENDING = int(os.getenv('PASSWORD_MAX_PENDING', PASSWORD_WORKERS * 4))
+PASSWORD_TIMEOUT = float(os.getenv('PASSWORD_TIMEOUT', 5))   # seconds a request waits for its hash
+# spawn keeps children free of the parent's threads and sockets; forkserver starts faster
+PASSWORD_POOL_START_METHOD = os.getenv('PASSWORD_POOL_START_METHOD', 'spawn')
+
+
+class PasswordPoolBusy(Exception):
+    """Every hashing slot is taken; the caller should answer 503"""
+
+
+def bcrypt_hash(password, rounds=None):
+    """Hash password in this process"""
+    salt = bcrypt.gensalt(rounds=rounds or BCRYPT_ROUNDS)
+    return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+
+
+def bcrypt_check(password, hashed):
+    """Check password against hash in this process"""
+    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+
+
+def hash_cost(hashed):
+    """Cost factor encoded in a $2b$NN$... hash, or None if unreadable"""
+    try:
+        return int(hashed.split('$')[2])
+    except (IndexError, ValueError):
+        return None
+
+
+def needs_rehash(hashed):
+    """True when hashed was made with a cost other than BCRYPT_ROUNDS"""
+    return hash_cost(hashed) != BCRYPT_ROUNDS
+
+
+class PasswordHasher:
+    """bcrypt on a process pool behind a bounded, non-blocking admission gate
+
+    At most max_pending hashes are queued or running; one more raises
+    PasswordPoolBusy immediately instead of piling up behind the others,
+    so a flood of logins turns into fast 503s while catalog and cart
+    requests keep their threads. With workers=0 hashing runs inline.
+    """
+
+    def __init__(self, workers=PASSWORD_WORKERS, max_pending=PASSWORD_MAX_PENDING, timeout=PASSWORD_TIMEOUT):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._in_flight_lock = threading.Lock()
+        self.in_flight = 0
+        self.rejected = 0
+
+    def _get_executor(self):
+        # Pools do not survive fork, so each worker process builds its own
+        if self._pid != os.getpid():
+            with self._start_lock:
+                if self._pid != os.getpid():
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context(PASSWORD_POOL_START_METHOD)
+                    )
+                    with self._in_flight_lock:
+                        self._slots = threading.BoundedSemaphore(self.max_pending)
+                        self.in_flight = 0
+                    self._pid = os.getpid()
+        return self._executor
+
+    def _run(self, fn, *args):
+        if self.workers <= 0:
+            return fn(*args)
+        executor = self._get_executor()
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            self.rejected += 1
+            raise PasswordPoolBusy('Password hashing is saturated')
+        try:
+            future = executor.submit(fn, *args)
+        except BrokenProcessPool:
+            slots.release()
+            self._pid = None  # a child died; the next call starts a fresh pool
+            raise PasswordPoolBusy('Password hashing pool restarting')
+        except Exception:
+            slots.release()
+            raise
+        with self._in_flight_lock:
+            if slots is self._slots:
+                self.in_flight += 1
+        # The slot is held until the work finishes, even if the request gave up waiting
+        future.add_done_callback(lambda _: self._finished(slots))
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            raise PasswordPoolBusy('Password hashing timed out')
+        except BrokenProcessPool:
+            self._pid = None
+            raise PasswordPoolBusy('Password hashing pool restarting')
+
+    def _finished(self, slots):
+        with self._in_flight_lock:
+            # Jobs from a pool that has since been replaced were not counted in this one
+            if slots is self._slots:
+                self.in_flight -= 1
+        slots.release()
+
+    def hash(self, password, rounds=None):
+        return self._run(bcrypt_hash, password, rounds or BCRYPT_ROUNDS)
+
+    def verify(self, password, hashed):
+        return self._run(bcrypt_check, password, hashed)
+
+    def warm_up(self):
+        """Start every worker process now rather than on the first login"""
+        if self.workers > 0:
+            executor = self._get_executor()
+            list(executor.map(hash_cost, ['$2b$04$'] * self.workers))
+
+    def stats(self):
+        return {
+            'workers': self.workers,
+            'max_pending': self.max_pending,
+            'in_use': self.in_flight,
+            'rejected': self.rejected,
+            'rounds': BCRYPT_ROUNDS
+        }
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,48 @@
+import re
+
+# Weighted document for products.search_vector: name ranks above description
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+)
+
+# Minimum word_similarity for the trigram (typo-tolerant) fallback; the
+# <% operator reads it from pg_trgm.word_similarity_threshold (default 0.6)
+TRIGRAM_THRESHOLD = 0.4
+
+_trigram_available = None
+
+
+def build_prefix_tsquery(search):
+    """Turn free text into a to_tsquery() string that prefix-matches every word
+
+    Returns None when the text has no usable words. Only word characters
+    survive, so the result is always a valid tsquery.
+    """
+    words = re.findall(r'\w+', search.lower())
+    if not words:
+        return None
+    return ' & '.join(f'{word}:*' for word in words)
+
+
+def trigram_available(cursor):
+    """Whether pg_trgm is installed (checked once per process)"""
+    global _trigram_available
+    if _trigram_available is None:
+        cursor.execute("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm') AS installed")
+        _trigram_available = cursor.fetchone()['installed']
+    return _trigram_available
+
+
+def set_trigram_threshold(cursor, threshold=TRIGRAM_THRESHOLD):
+    """Make <% use threshold for the rest of the current transaction
+
+    set_config(..., true) is SET LOCAL, so the setting ends with the
+    transaction and never leaks to the next user of a pooled connection.
+    """
+    cursor.execute("SELECT set_config('pg_trgm.word_similarity_threshold', %s, true)", (str(threshold),))
+
+
+def refresh_search_vector(cursor, product_id):
+    """Recompute search_vector for one product after its name/description changed"""
+    cursor.execute(f"UPDATE products SET search_vector = {SEARCH_VECTOR_SQL} WHERE id = %s", (product_id,))
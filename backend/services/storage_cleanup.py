@@ -0,0 +1,116 @@
+import posixpath
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime, timezone
+
+# S3 DeleteObjects accepts at most 1000 keys per call
+DELETE_BATCH_SIZE = 1000
+
+
+def iter_objects(s3_client, bucket, prefix=''):
+    """Yield every object under prefix, following pagination"""
+    paginator = s3_client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+        yield from page.get('Contents', ())
+
+
+def referenced_keys(conn):
+    """image_key values still used by a product (active or not)"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT DISTINCT image_key FROM products WHERE image_key IS NOT NULL")
+        return {row['image_key'] for row in cursor.fetchall()}
+    finally:
+        cursor.close()
+
+
+def is_referenced(key, keys, stems):
+    """True for a referenced original or one of its size variants
+
+    Variants live at dir/<variant>/<stem>.webp next to dir/<stem>.<ext>;
+    stems holds (dir, stem) for every referenced original.
+    """
+    if key in keys:
+        return True
+    variant_dir, filename = posixpath.split(key)
+    stem = posixpath.splitext(filename)[0]
+    return (posixpath.dirname(variant_dir), stem) in stems
+
+
+def select_orphans(objects, keys, min_age=None):
+    """Yield keys of objects nothing references, skipping ones newer than min_age
+
+    The age guard protects uploads whose product has not been created yet.
+    """
+    stems = {(posixpath.dirname(key), posixpath.splitext(posixpath.basename(key))[0]) for key in keys}
+    cutoff = datetime.now(timezone.utc) - min_age if min_age else None
+    for obj in objects:
+        if cutoff and obj['LastModified'] > cutoff:
+            continue
+        if not is_referenced(obj['Key'], keys, stems):
+            yield obj['Key']
+
+
+def _delete_batch(s3_client, bucket, keys, max_retries):
+    """Delete one batch, retrying keys S3 reports as failed; returns (deleted, errors)"""
+    pending = list(keys)
+    errors = []
+    for attempt in range(max_retries + 1):
+        response = s3_client.delete_objects(
+            Bucket=bucket,
+            Delete={'Objects': [{'Key': key} for key in pending], 'Quiet': True}
+        )
+        errors = response.get('Errors', [])
+        if not errors:
+            return len(keys), []
+        pending = [error['Key'] for error in errors]
+        if attempt < max_retries:
+            time.sleep(min(2 ** attempt * 0.5, 10))
+    return len(keys) - len(pending), errors
+
+
+def batched(keys, size=DELETE_BATCH_SIZE):
+    """Group an iterable of keys into lists of at most size"""
+    batch = []
+    for key in keys:
+        batch.append(key)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def delete_keys(s3_client, bucket, keys, workers=8, dry_run=False, max_retries=3, on_batch=None):
+    """Delete keys in 1000-key DeleteObjects calls spread over a thread pool
+
+    keys may be any iterable (e.g. a generator over a paginated listing); at
+    most 2 * workers batches are in flight, so memory stays bounded. Keys
+    S3 rejects are retried with backoff. With dry_run nothing is deleted.
+    on_batch(deleted_count, errors) is called as each batch finishes.
+    Returns {'deleted': n, 'failed': [{'Key', 'Code', 'Message'}, ...]}.
+    """
+    result = {'deleted': 0, 'failed': []}
+
+    def finished(deleted, errors):
+        result['deleted'] += deleted
+        result['failed'].extend(errors)
+        if on_batch:
+            on_batch(deleted, errors)
+
+    if dry_run:
+        for batch in batched(keys):
+            finished(len(batch), [])
+        return result
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        in_flight = set()
+        for batch in batched(keys):
+            if len(in_flight) >= workers * 2:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    finished(*future.result())
+            in_flight.add(executor.submit(_delete_batch, s3_client, bucket, batch, max_retries))
+        for future in in_flight:
+            finished(*future.result())
+    return result
@@ -0,0 +1,436 @@
+import hashlib
+import io
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from boto3.s3.transfer import TransferConfig
+from psycopg2.extras import Json
+from dotenv import load_dotenv
+from PIL import Image
+from config.database import get_db_connection
+from config.logger import get_logger
+from services.media import media, digest_key, variant_key, IMAGES_BUCKET, IMMUTABLE_CACHE_CONTROL
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+# Upload pipeline configuration
+MAX_UPLOAD_BYTES = int(os.getenv('MAX_UPLOAD_BYTES', 10 * 1024 * 1024))
+UPLOAD_WORKERS = int(os.getenv('UPLOAD_WORKERS', 4))
+UPLOAD_SPOOL_DIR = os.getenv('UPLOAD_SPOOL_DIR') or None           # None = system temp dir
+UPLOAD_JOB_TTL = float(os.getenv('UPLOAD_JOB_TTL', 3600))            # seconds a job stays queryable
+SPOOL_CHUNK_SIZE = 64 * 1024
+PRESIGNED_URL_EXPIRES = int(os.getenv('PRESIGNED_URL_EXPIRES', 300))  # seconds
+
+# Content types accepted for product images, by file extension
+IMAGE_CONTENT_TYPES = {
+    'png': 'image/png',
+    'jpg': 'image/jpeg',
+    'jpeg': 'image/jpeg',
+    'gif': 'image/gif',
+    'webp': 'image/webp'
+}
+# Presigned uploads land here and are only moved under products/ once verified.
+# Nothing outside this prefix is ever deleted by verification; give it an S3
+# lifecycle rule so abandoned uploads expire.
+DIRECT_UPLOAD_PREFIX = 'uploads/pending'
+DIRECT_UPLOAD_KEY = re.compile(
+    rf"^{re.escape(DIRECT_UPLOAD_PREFIX)}/([0-9a-f]{{32}})\.({'|'.join(IMAGE_CONTENT_TYPES)})$"
+)
+
+# Files above the threshold go up as concurrent multipart chunks
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=int(os.getenv('UPLOAD_MULTIPART_THRESHOLD', 8 * 1024 * 1024)),
+    multipart_chunksize=int(os.getenv('UPLOAD_MULTIPART_CHUNKSIZE', 8 * 1024 * 1024)),
+    max_concurrency=int(os.getenv('UPLOAD_MULTIPART_CONCURRENCY', 4))
+)
+
+
+class UploadTooLarge(Exception):
+    """Raised while spooling once a file exceeds MAX_UPLOAD_BYTES"""
+
+
+class InvalidUpload(Exception):
+    """Raised when an uploaded file or object fails validation"""
+
+
+class UploadPipeline:
+    """Spools uploads to disk and pushes them to S3 on a background thread pool
+
+    submit() returns as soon as the file is on local disk. A worker then
+    checks that Pillow can parse it, uploads the original (multipart when
+    large), renders the configured WebP size variants and records the
+    outcome. Job state lives in the upload_jobs table, so any worker can
+    answer a status poll, not just the one running the upload. Jobs older
+    than UPLOAD_JOB_TTL are pruned on the next submit.
+    """
+
+    def __init__(self, workers=UPLOAD_WORKERS):
+        self.workers = workers
+        self._executor = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def _get_executor(self):
+        # Threads do not survive fork, so each worker process builds its own pool
+        if self._pid != os.getpid():
+            with self._start_lock:
+                if self._pid != os.getpid():
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                        thread_name_prefix='upload')
+                    self._pid = os.getpid()
+        return self._executor
+
+    def spool(self, stream):
+        """Copy stream to a temp file; returns (path, size, sha256 hexdigest)"""
+        digest = hashlib.sha256()
+        size = 0
+        spool_file = tempfile.NamedTemporaryFile(prefix='upload-', dir=UPLOAD_SPOOL_DIR, delete=False)
+        try:
+            with spool_file:
+                while True:
+                    chunk = stream.read(SPOOL_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > MAX_UPLOAD_BYTES:
+                        raise UploadTooLarge(f'File exceeds {MAX_UPLOAD_BYTES // (1024 * 1024)} MB limit')
+                    digest.update(chunk)
+                    spool_file.write(chunk)
+        except Exception:
+            os.unlink(spool_file.name)
+            raise
+        return spool_file.name, size, digest.hexdigest()
+
+    def submit(self, s3_client, stream, extension, image_key=None):
+        """Spool stream and queue it for upload; returns the job dict
+
+        Without image_key the key is content-hashed and uploaded with an
+        immutable Cache-Control. The stored Content-Type comes from the
+        extension, never from the client.
+        """
+        extension = extension.lower()
+        content_type = IMAGE_CONTENT_TYPES[extension]
+        path, size, hexdigest = self.spool(stream)
+        immutable = not image_key
+        if not image_key:
+            image_key = digest_key(hexdigest, extension)
+
+        job = {
+            'id': uuid.uuid4().hex,
+            'status': 'queued',
+            'image_key': image_key,
+            'image_url': media.url(image_key),
+            'size': size,
+            'variants': {},
+            'error': None,
+            'created_at': time.time(),
+            'finished_at': None
+        }
+        try:
+            self._insert(job)
+        except Exception:
+            os.unlink(path)
+            raise
+
+        try:
+            self._get_executor().submit(self._run, s3_client, job, path, content_type, immutable)
+        except Exception:
+            os.unlink(path)
+            raise
+        return job
+
+    def get(self, job_id):
+        """Job dict for job_id, or None if unknown or expired"""
+        conn = get_db_connection()
+        if not conn:
+            raise RuntimeError('Database connection failed')
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+                SELECT id, status, image_key, size, variants, error, created_at, finished_at
+                FROM upload_jobs
+                WHERE id = %s AND created_at > NOW() - make_interval(secs => %s)
+            """, (job_id, UPLOAD_JOB_TTL))
+            row = cursor.fetchone()
+        finally:
+            cursor.close()
+            conn.close()
+        if row is None:
+            return None
+        return {
+            'id': row['id'],
+            'status': row['status'],
+            'image_key': row['image_key'],
+            'image_url': media.url(row['image_key']),
+            'size': row['size'],
+            'variants': row['variants'],
+            'error': row['error'],
+            'created_at': row['created_at'].timestamp(),
+            'finished_at': row['finished_at'].timestamp() if row['finished_at'] else None
+        }
+
+    def _insert(self, job):
+        # Pruning here keeps the table to roughly UPLOAD_JOB_TTL of uploads
+        conn = get_db_connection()
+        if not conn:
+            raise RuntimeError('Database connection failed')
+        cursor = conn.cursor()
+        try:
+            cursor.execute("DELETE FROM upload_jobs WHERE created_at < NOW() - make_interval(secs => %s)",
+                           (UPLOAD_JOB_TTL,))
+            cursor.execute("""
+                INSERT INTO upload_jobs (id, status, image_key, size)
+                VALUES (%s, %s, %s, %s)
+            """, (job['id'], job['status'], job['image_key'], job['size']))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+
+    def _update(self, job):
+        conn = get_db_connection()
+        if not conn:
+            logger.error("Could not record upload job state", extra={'job_id': job['id'], 'status': job['status']})
+            return
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+                UPDATE upload_jobs
+                SET status = %s, variants = %s, error = %s, finished_at = to_timestamp(%s)
+                WHERE id = %s
+            """, (job['status'], Json(job['variants']), job['error'], job['finished_at'], job['id']))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            logger.exception("Error recording upload job state", extra={'job_id': job['id']})
+        finally:
+            cursor.close()
+            conn.close()
+
+    def _run(self, s3_client, job, path, content_type, immutable):
+        job['status'] = 'processing'
+        self._update(job)
+        started = time.perf_counter()
+        extra_args = {'ContentType': content_type}
+        if immutable:
+            extra_args['CacheControl'] = IMMUTABLE_CACHE_CONTROL
+        try:
+            # Reject files that are not images before anything reaches S3
+            check_image(path)
+            s3_client.upload_file(path, IMAGES_BUCKET, job['image_key'],
+                                  ExtraArgs=extra_args, Config=TRANSFER_CONFIG)
+            job['variants'] = store_variants(s3_client, job['image_key'], path,
+                                             extra_args.get('CacheControl'))
+            job['status'] = 'done'
+            logger.info("Image uploaded", extra={
+                'bucket': IMAGES_BUCKET, 'image_key': job['image_key'], 'bytes': job['size'],
+                'variants': len(job['variants']), 'seconds': round(time.perf_counter() - started, 3)
+            })
+        except InvalidUpload as e:
+            job['status'] = 'failed'
+            job['error'] = str(e)
+        except Exception as e:
+            job['status'] = 'failed'
+            job['error'] = str(e)
+            logger.exception("Error uploading image to S3", extra={'image_key': job['image_key']})
+        finally:
+            job['finished_at'] = time.time()
+            os.unlink(path)
+            self._update(job)
+
+
+def render_variants(path):
+    """WebP bytes for each configured width: {name: bytes}"""
+    if not media.variants:
+        return {}
+    variants = {}
+    with Image.open(path) as original:
+        original.load()
+        for name, width in media.variants.items():
+            image = original.copy()
+            image.thumbnail((width, width * 4))
+            if image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGBA')
+            buffer = io.BytesIO()
+            image.save(buffer, format='WEBP', quality=80)
+            variants[name] = buffer.getvalue()
+    return variants
+
+
+def store_variants(s3_client, image_key, path, cache_control=None):
+    """Render, upload and register the variants of the image at path; returns {name: url}
+
+    The original must already be under image_key. Variants are registered
+    only after every one of them is in S3, so media.apply() never advertises
+    one that is missing.
+    """
+    variants = render_variants(path)
+    if not variants:
+        return {}
+    extra_args = {'ContentType': 'image/webp'}
+    if cache_control:
+        extra_args['CacheControl'] = cache_control
+    for name, body in variants.items():
+        s3_client.put_object(Bucket=IMAGES_BUCKET, Key=variant_key(image_key, name), Body=body, **extra_args)
+    register_variants(image_key, list(variants))
+    return {name: media.url(variant_key(image_key, name)) for name in variants}
+
+
+def register_variants(image_key, names):
+    """Record which variants exist for image_key (see media.apply)"""
+    conn = get_db_connection()
+    if not conn:
+        raise RuntimeError('Database connection failed')
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            INSERT INTO image_variants (image_key, variants)
+            VALUES (%s, %s)
+            ON CONFLICT (image_key) DO UPDATE SET variants = EXCLUDED.variants
+        """, (image_key, sorted(names)))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def check_image(path):
+    """Raise InvalidUpload unless Pillow can parse the file at path"""
+    try:
+        with Image.open(path) as image:
+            image.verify()
+    except Exception:
+        raise InvalidUpload('File is not a valid image')
+
+
+def presign_upload(s3_client, extension, method='post'):
+    """Presigned request letting a browser upload one image straight to S3
+
+    The object goes to a random key under DIRECT_UPLOAD_PREFIX;
+    promote_upload() moves it under products/ once verify_upload() accepts
+    it. Keys are never reused, so it is still served as immutable. A POST
+    policy enforces the content type and 1..MAX_UPLOAD_BYTES size; a PUT URL
+    signs the content type, and verify_upload() checks the size afterwards.
+    The bucket needs a CORS rule allowing the storefront origin.
+    """
+    extension = extension.lower()
+    content_type = IMAGE_CONTENT_TYPES[extension]
+    image_key = f"{DIRECT_UPLOAD_PREFIX}/{uuid.uuid4().hex}.{extension}"
+
+    if method == 'put':
+        url = s3_client.generate_presigned_url('put_object', Params={
+            'Bucket': IMAGES_BUCKET,
+            'Key': image_key,
+            'ContentType': content_type,
+            'CacheControl': IMMUTABLE_CACHE_CONTROL
+        }, ExpiresIn=PRESIGNED_URL_EXPIRES)
+        return {
+            'method': 'PUT',
+            'url': url,
+            'headers': {'Content-Type': content_type, 'Cache-Control': IMMUTABLE_CACHE_CONTROL},
+            'image_key': image_key,
+            'expires_in': PRESIGNED_URL_EXPIRES
+        }
+
+    post = s3_client.generate_presigned_post(
+        Bucket=IMAGES_BUCKET,
+        Key=image_key,
+        Fields={'Content-Type': content_type, 'Cache-Control': IMMUTABLE_CACHE_CONTROL},
+        Conditions=[
+            {'Content-Type': content_type},
+            {'Cache-Control': IMMUTABLE_CACHE_CONTROL},
+            ['content-length-range', 1, MAX_UPLOAD_BYTES]
+        ],
+        ExpiresIn=PRESIGNED_URL_EXPIRES
+    )
+    return {
+        'method': 'POST',
+        'url': post['url'],
+        'fields': post['fields'],
+        'image_key': image_key,
+        'expires_in': PRESIGNED_URL_EXPIRES
+    }
+
+
+def verify_upload(s3_client, image_key):
+    """Check a directly uploaded object; returns its head_object metadata
+
+    Only keys issued by presign_upload() are accepted. Objects that exist
+    but break the rules are deleted before InvalidUpload is raised, so a
+    rejected upload leaves nothing behind; the key check guarantees that
+    delete never touches anything outside DIRECT_UPLOAD_PREFIX.
+    """
+    match = DIRECT_UPLOAD_KEY.match(image_key or '')
+    if not match:
+        raise InvalidUpload('Invalid image key')
+    extension = match.group(2)
+
+    try:
+        head = s3_client.head_object(Bucket=IMAGES_BUCKET, Key=image_key)
+    except s3_client.exceptions.ClientError as e:
+        if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+            raise InvalidUpload('Image has not been uploaded')
+        raise
+
+    problem = None
+    if not 0 < head['ContentLength'] <= MAX_UPLOAD_BYTES:
+        problem = f'Image must be between 1 byte and {MAX_UPLOAD_BYTES // (1024 * 1024)} MB'
+    elif head.get('ContentType') != IMAGE_CONTENT_TYPES[extension]:
+        problem = 'Image content type does not match its extension'
+    if problem:
+        s3_client.delete_object(Bucket=IMAGES_BUCKET, Key=image_key)
+        raise InvalidUpload(problem)
+    return head
+
+
+def finish_upload(s3_client, image_key):
+    """Verify, validate and promote a direct upload; returns (final_key, head, variants)
+
+    The object is downloaded once so Pillow can check it is really an image
+    (a non-image is deleted and rejected like any other invalid upload) and
+    render the same size variants the upload pipeline makes.
+    """
+    head = verify_upload(s3_client, image_key)
+    fd, path = tempfile.mkstemp(prefix='upload-', dir=UPLOAD_SPOOL_DIR)
+    os.close(fd)
+    try:
+        s3_client.download_file(IMAGES_BUCKET, image_key, path)
+        try:
+            check_image(path)
+        except InvalidUpload:
+            s3_client.delete_object(Bucket=IMAGES_BUCKET, Key=image_key)
+            raise
+        final_key = promote_upload(s3_client, image_key)
+        variants = store_variants(s3_client, final_key, path, IMMUTABLE_CACHE_CONTROL)
+    finally:
+        os.unlink(path)
+    return final_key, head, variants
+
+
+def promote_upload(s3_client, image_key):
+    """Move a verified direct upload under products/; returns the new key"""
+    match = DIRECT_UPLOAD_KEY.match(image_key)
+    if not match:
+        raise InvalidUpload('Invalid image key')
+    final_key = digest_key(match.group(1), match.group(2))
+    # COPY keeps the Content-Type and Cache-Control set at upload time
+    s3_client.copy_object(Bucket=IMAGES_BUCKET, Key=final_key, MetadataDirective='COPY',
+                          CopySource={'Bucket': IMAGES_BUCKET, 'Key': image_key})
+    s3_client.delete_object(Bucket=IMAGES_BUCKET, Key=image_key)
+    return final_key
+
+
+# Shared pipeline; the thread pool starts on first use in each process
+upload_pipeline = UploadPipeline()
@@ -0,0 +1,136 @@
+"""Concurrent checkout stress test against a local Postgres.
+
+Creates a few products with limited stock, fills one cart per simulated
+user with one unit of every product (in shuffled order, to exercise lock
+ordering), then fires all checkouts in parallel through the Flask app and
+checks that stock was never oversold.
+
+    python stress_checkout.py --orders 300 --stock 100 --products 3 --workers 32
+
+Point DB_* at a disposable database; the rows it creates are removed at the end.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Concurrent checkout stress test')
+    parser.add_argument('--orders', type=int, default=300, help='number of parallel checkouts')
+    parser.add_argument('--stock', type=int, default=100, help='starting stock per product')
+    parser.add_argument('--products', type=int, default=3, help='products in every cart')
+    parser.add_argument('--workers', type=int, default=32, help='concurrent client threads')
+    return parser.parse_args()
+
+
+def setup(conn, run_id, args):
+    """Create the products and carts for this run"""
+    cursor = conn.cursor()
+    product_ids = []
+    for i in range(args.products):
+        cursor.execute("""
+            INSERT INTO products (name, description, price, category, stock, is_active)
+            VALUES (%s, 'stress test product', 10.00, 'StressTest', %s, true)
+            RETURNING id
+        """, (f'stress-{run_id}-{i}', args.stock))
+        product_ids.append(cursor.fetchone()['id'])
+
+    user_ids = [f'stress-{run_id}-{n}' for n in range(args.orders)]
+    for user_id in user_ids:
+        for product_id in random.sample(product_ids, len(product_ids)):
+            cursor.execute("""
+                INSERT INTO cart (user_id, product_id, quantity, created_at)
+                VALUES (%s, %s, 1, NOW())
+            """, (user_id, product_id))
+    conn.commit()
+    cursor.close()
+    return product_ids, user_ids
+
+
+def cleanup(conn, run_id, product_ids):
+    """Remove everything this run created"""
+    cursor = conn.cursor()
+    pattern = f'stress-{run_id}-%'
+    cursor.execute("DELETE FROM order_items WHERE order_id IN (SELECT id FROM orders WHERE user_id LIKE %s)", (pattern,))
+    cursor.execute("DELETE FROM orders WHERE user_id LIKE %s", (pattern,))
+    cursor.execute("DELETE FROM cart WHERE user_id LIKE %s", (pattern,))
+    cursor.execute("DELETE FROM products WHERE id = ANY(%s)", (product_ids,))
+    conn.commit()
+    cursor.close()
+
+
+def main():
+    args = parse_args()
+
+    # Every client thread needs its own pooled connection
+    os.environ.setdefault('DB_POOL_MAX_SIZE', str(args.workers))
+    os.environ.setdefault('DB_POOL_TIMEOUT', '30')
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+    from app import create_app
+    from config.auth import create_access_token
+    from config.database import create_connection
+
+    run_id = uuid.uuid4().hex[:8]
+    conn = create_connection()
+    product_ids, user_ids = setup(conn, run_id, args)
+    client = create_app().test_client()
+
+    # Checkout takes the user from the Bearer token
+    tokens = {user_id: create_access_token(user_id, f'{user_id}@example.com', user_id) for user_id in user_ids}
+    
+    def checkout(user_id):
+        started = time.perf_counter()
+        response = client.post('/api/orders', json={},
+                               headers={'Authorization': f'Bearer {tokens[user_id]}'})
+        return response.status_code, time.perf_counter() - started
+
+    print(f"🚀 {args.orders} checkouts, {args.products} products x {args.stock} stock, {args.workers} workers")
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        results = list(executor.map(checkout, user_ids))
+    elapsed = time.perf_counter() - started
+
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, stock FROM products WHERE id = ANY(%s)", (product_ids,))
+        stock = {row['id']: row['stock'] for row in cursor.fetchall()}
+        cursor.execute("SELECT COUNT(*) AS n FROM orders WHERE user_id LIKE %s", (f'stress-{run_id}-%',))
+        orders_created = cursor.fetchone()['n']
+        cursor.close()
+
+        succeeded = sum(1 for status, _ in results if status == 200)
+        rejected = sum(1 for status, _ in results if status == 400)
+        errors = len(results) - succeeded - rejected
+        latencies = sorted(latency for _, latency in results)
+        expected = min(args.orders, args.stock)
+
+        print(f"   succeeded: {succeeded}  rejected (sold out): {rejected}  errors: {errors}")
+        print(f"   throughput: {len(results) / elapsed:.1f} checkouts/s over {elapsed:.2f}s")
+        print(f"   latency p50: {statistics.median(latencies) * 1000:.1f} ms  "
+              f"p95: {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f} ms  "
+              f"max: {latencies[-1] * 1000:.1f} ms")
+        print(f"   final stock: {sorted(stock.values())}")
+
+        ok = (errors == 0 and
+              succeeded == expected == orders_created and
+              all(value == args.stock - succeeded for value in stock.values()))
+        if ok:
+            print("✅ No oversell: stock and orders are consistent")
+        else:
+            print(f"❌ Inconsistent result: expected {expected} orders, got {orders_created}")
+        return ok
+
+    finally:
+        cleanup(conn, run_id, product_ids)
+        conn.close()
+
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
@@ -88,16 +88,10 @@ function setupAddProductForm() {
       submitBtn.disabled = true;
       submitBtn.textContent = 'Uploading Image...';
       
-      // 1. Upload image to S3
-      const timestamp = Date.now();
-      const imageKey = `products/${timestamp}-${imageFile.name.replace(/\s/g, '-')}`;
-      
-      const formData = new FormData();
-      formData.append('image', imageFile);
-      formData.append('image_key', imageKey);
-      
-      const uploadResult = await API.uploadImage(formData);
+      // 1. Upload image straight to S3 (the API only signs and verifies)
+      const uploadResult = await API.uploadImageDirect(imageFile);
       console.log('Image uploaded:', uploadResult);
+      const imageKey = uploadResult.image_key;
       
       // 2. Create product
       submitBtn.textContent = 'Creating Product...';
@@ -139,7 +133,7 @@ async function loadAdminProducts(filters = {}) {
   try {
     showLoading('products-list');
     
-    const products = await API.getProducts(filters);
+    const products = await API.getAdminProducts(filters);
     
     displayAdminProducts(products);
     
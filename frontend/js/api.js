@@ -13,9 +13,15 @@ const API = {
     localStorage.setItem('token', token);
   },
   
+  // Get refresh token (used to renew the short-lived access token)
+  getRefreshToken() {
+    return localStorage.getItem('refreshToken');
+  },
+  
   // Remove token (logout)
   clearToken() {
     localStorage.removeItem('token');
+    localStorage.removeItem('refreshToken');
     localStorage.removeItem('user');
   },
   
@@ -28,8 +34,8 @@ const API = {
     return user.id;
   },
   
-  // Make API request
-  async request(endpoint, options = {}) {
+  // Make API request (retried once with a renewed token after a 401)
+  async request(endpoint, options = {}, retry = true) {
     const token = this.getToken();
     
     const headers = {
@@ -51,6 +57,12 @@ const API = {
         headers
       });
       
+      if (response.status === 401 && retry && token && !endpoint.startsWith('/auth/')) {
+        if (await this.refreshSession()) {
+          return this.request(endpoint, options, false);
+        }
+      }
+      
       const data = await response.json();
       
       if (!response.ok) {
@@ -64,6 +76,46 @@ const API = {
     }
   },
   
+  // Swap the refresh token for a new token pair; false if the session is over.
+  // Concurrent 401s share one refresh, since each refresh token works only once.
+  async refreshSession() {
+    if (!this.refreshing) {
+      this.refreshing = this.renewTokens().finally(() => {
+        this.refreshing = null;
+      });
+    }
+    return this.refreshing;
+  },
+  
+  async renewTokens() {
+    const refreshToken = this.getRefreshToken();
+    if (!refreshToken) {
+      return false;
+    }
+    
+    try {
+      const response = await fetch(`${this.baseURL}/auth/refresh`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ refresh_token: refreshToken })
+      });
+      
+      if (!response.ok) {
+        this.clearToken();
+        return false;
+      }
+      
+      const data = await response.json();
+      localStorage.setItem('user', JSON.stringify(data.user));
+      localStorage.setItem('token', data.token);
+      localStorage.setItem('refreshToken', data.refresh_token);
+      return true;
+    } catch (error) {
+      console.error('Token refresh error:', error);
+      return false;
+    }
+  },
+  
   // Helper methods for HTTP verbs
   async get(endpoint) {
     return this.request(endpoint, { method: 'GET' });
@@ -165,39 +217,43 @@ const API = {
   },
   
   async logout() {
+    try {
+      // Revoke both tokens server-side so a copied token stops working
+      await this.request('/auth/logout', {
+        method: 'POST',
+        body: JSON.stringify({ refresh_token: this.getRefreshToken() })
+      }, false);
+    } catch (error) {
+      // Tokens are cleared locally either way
+    }
     this.clearToken();
     return { message: 'Logged out successfully' };
   },
   
   // === ADMIN ===
   
-  // Admin - Image Upload
-  async uploadImage(formData) {
-    const token = this.getToken();
+  // Admin - Upload an image straight to S3 with a presigned POST
+  async uploadImageDirect(file) {
+    const upload = await this.post('/admin/upload-url', { filename: file.name });
     
-    try {
-      const response = await fetch(`${this.baseURL}/admin/upload-image`, {
-        method: 'POST',
-        headers: {
-          'Authorization': `Bearer ${token}`
-        },
-        body: formData  // Don't set Content-Type, let browser set it
-      });
-      
-      const data = await response.json();
-      
-      if (!response.ok) {
-        throw new Error(data.error || 'Failed to upload image');
-      }
-      
-      return data;
-    } catch (error) {
-      console.error('Upload error:', error);
-      throw error;
+    const formData = new FormData();
+    Object.entries(upload.fields).forEach(([name, value]) => formData.append(name, value));
+    formData.append('file', file);  // must be the last field
+    
+    const response = await fetch(upload.url, { method: 'POST', body: formData });
+    if (!response.ok) {
+      throw new Error('Failed to upload image');
     }
+    
+    return this.post('/admin/upload-complete', { image_key: upload.image_key });
   },
   
   // Admin - Product Management
+  async getAdminProducts(filters = {}) {
+    const params = new URLSearchParams(filters);
+    return this.get(`/admin/products?${params}`);
+  },
+  
   async createProduct(productData) {
     return this.post('/admin/products', productData);
   },
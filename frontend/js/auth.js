@@ -12,24 +12,24 @@ function isLoggedIn() {
 }
 
 // Save user after login
-function saveUser(user, token) {
+function saveUser(user, token, refreshToken) {
   localStorage.setItem('user', JSON.stringify(user));
   localStorage.setItem('token', token);
+  localStorage.setItem('refreshToken', refreshToken);
   localStorage.setItem('loginTime', Date.now().toString());
 }
 
 // Logout
-function logout() {
+async function logout() {
   if (confirm('Are you sure you want to logout?')) {
-    localStorage.removeItem('user');
-    localStorage.removeItem('token');
+    await API.logout();
     localStorage.removeItem('loginTime');
     showToast('Logged out successfully', 'success');
     window.location.href = 'index.html';
   }
 }
 
-// Check session validity (24 hour timeout)
+// Check session validity (7 days, the refresh token lifetime)
 function checkSession() {
   const user = getCurrentUser();
   if (!user) return;
@@ -37,9 +37,10 @@ function checkSession() {
   const loginTime = localStorage.getItem('loginTime');
   if (loginTime) {
     const hours = (Date.now() - parseInt(loginTime)) / (1000 * 60 * 60);
-    if (hours > 24) {
+    if (hours > 24 * 7) {
       localStorage.removeItem('user');
       localStorage.removeItem('token');
+      localStorage.removeItem('refreshToken');
       localStorage.removeItem('loginTime');
       showToast('Session expired. Please login again.', 'warning');
       if (window.location.pathname !== '/login.html') {
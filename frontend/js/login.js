@@ -31,7 +31,7 @@ document.addEventListener('DOMContentLoaded', () => {
         
         const response = await API.login(email, password);
         
-        saveUser(response.user, response.token);
+        saveUser(response.user, response.token, response.refresh_token);
         showToast('Login successful!', 'success');
         
         setTimeout(() => {
@@ -75,7 +75,7 @@ document.addEventListener('DOMContentLoaded', () => {
         
         const response = await API.register(name, email, password);
         
-        saveUser(response.user, response.token);
+        saveUser(response.user, response.token, response.refresh_token);
         showToast('Account created successfully!', 'success');
         
         setTimeout(() => {